@@ -1,49 +1,55 @@
 import constants
-import uuid
+import disease
+import itertools
 import random
-from faker import Faker
-fake = Faker()
+import names
 
 
 class Agent:
     """Class representing a human being
     """
-    def __init__(self, pos_X, pos_Y, name="anonymous", age=None, health_status=0, immune_system_response=0, wear_mask=None):
+    # no instance dictionary, so each agent takes a fraction of the memory
+    __slots__ = ("id", "_name", "age", "health_status", "previous_health_status", "immune_system_response",
+                 "pos_X", "pos_Y", "infected_days", "recovered", "wear_mask", "quarantine")
+
+    # sequential ids for the agents created without one
+    ids = itertools.count()
+
+    def __init__(self, pos_X, pos_Y, name="anonymous", age=None, health_status=0, immune_system_response=0, wear_mask=None, rng=random,
+                 agent_id=None):
         """Class constructor
 
         Args:
             pos_X (Integer): Agent's x axis position
             pos_Y (Integer): Agent's y axis position
-            name (str, optional): Agent's name. Defaults to "anonymous".
+            name (str, optional): Agent's name. Defaults to "anonymous". If None, the name comes from the names pool on the first access.
             age (Integer, optional): Agent's age. Defaults to None.
             health_status (inIntegert, optional): Agent's health status. Defaults to 0.
             immune_system_response (Integer, optional): Agent's Immune System response type. Defaults to 0.
             wear_mask (Boolean, optional): If agent wears a mask. Defaults to None.
+            rng (RandomStreams, optional): Random numbers generator. Defaults to the random module.
+            agent_id (Integer, optional): Agent's id. Defaults to None, the next sequential id.
         """
         if age is None:
-            age = random.randint(0, 100)
-
-        if name is None:
-            name = fake.name()
+            age = rng.randint(0, 100)
 
         if health_status is None:
             health_status = 0
 
         if immune_system_response is None:
-            immune_system_response = Agent.immune_response_by_age(age, health_status)
+            immune_system_response = Agent.immune_response_by_age(age, health_status, rng)
 
         if wear_mask is None:
-            wear_mask = bool(random.getrandbits(1))
+            wear_mask = rng.random() < 0.5
 
-        self.id = uuid.uuid1()
-        self.name = name
+        self.id = next(Agent.ids) if agent_id is None else agent_id
+        self._name = name
         self.age = age
         self.health_status = health_status
         self.previous_health_status = None
         self.immune_system_response = immune_system_response
         self.pos_X = pos_X
         self.pos_Y = pos_Y
-        self.pos_tuple = (self.pos_X, self.pos_Y)
         self.infected_days = None
         self.recovered = False
         self.wear_mask = wear_mask
@@ -59,7 +65,42 @@ class Agent:
         """
         self.pos_X = pos_X
         self.pos_Y = pos_Y
-        self.pos_tuple = (self.pos_X, self.pos_Y)
+
+    @property
+    def name(self):
+        """Agent's name, taken from the names pool on the first access if the agent was created with no name
+
+        Returns:
+            (String): Agent's name
+        """
+        if self._name is None:
+            self._name = names.agent_name(self.id)
+        return self._name
+
+    @property
+    def pos_tuple(self):
+        """Agent's position as a tuple
+
+        Returns:
+            (Tuple): x and y axis position
+        """
+        return (self.pos_X, self.pos_Y)
+
+    def __eq__(self, other):
+        """Overrides how the `==` operator is used in the Agent class
+
+        Returns:
+            (Boolean): if agents' ids are equal
+        """
+        return isinstance(other, Agent) and self.id == other.id
+
+    def __hash__(self):
+        """Overrides the agent's hash, so it is based on its id
+
+        Returns:
+            (Integer): Agent's hash
+        """
+        return self.id
 
     def __str__(self):
         """Overrides how the agent is printed
@@ -70,71 +111,15 @@ class Agent:
         return f"\n\nAgent {self.id}\nName: {self.name}\nAge: {self.age}\nHealth Status: {self.health_status}\nImmune System Response: {self.immune_system_response}\nPosition: ({self.pos_X}, {self.pos_Y}) "
 
     @staticmethod
-    def immune_response_by_age(age, health_status):
-        """Returns the immune system response type according to the agent's age
+    def immune_response_by_age(age, health_status, rng=random):
+        """Returns the immune system response type according to the agent's age, from the disease immune response table
 
         Args:
             age (Integer): Agent's age
             health_status (Integer): Agent's health status
+            rng (RandomStreams, optional): Random numbers generator. Defaults to the random module
 
         Returns:
             (Integer): Immune system response type
         """
-        
-        def age_probabilities(value, pdir, health_status):
-            """Returns Immune response type based on age, health status, and probability of having a deadly immune system response
-            
-            0______|P_DIR|_______1
-
-            0__|ADM_HOSP_P|____|ADM_HOSP_P + ADM_HOSP_ICU_P|___|19/20|___|1/20|__1
-            
-            Args:
-                value (Float): Random value between 0 and 1
-                pdir (Float): Probability of having a deadly immune system response based on the agent's age
-                health_status (INteger):Agent's health status
-
-            Returns:
-                (Integer): Immune system response type
-            """
-            value_d = random.random()
-            if value < constants.ADM_HOSP_P:
-                if value_d < pdir:
-                    return constants.IMR_DEADLY_INFECTED
-                else:
-                    return constants.IMR_MODERATELY_INFECTED
-            elif value > constants.ADM_HOSP_P and value < constants.ADM_HOSP_P + constants.ADM_HOSP_ICU_P:
-                if value_d < pdir:
-                    return constants.IMR_DEADLY_INFECTED
-                else:
-                    return constants.IMR_SEVERE_INFECTED
-            else:  # prob of being healthy
-                if value_d < pdir:
-                    return constants.IMR_DEADLY_INFECTED
-                elif value_d > pdir:
-                    # 19.8/20 chances to be ASYMPTOMATIC over IMMUNE
-                    if value < 19.8 * ((1-pdir) / 20):
-                        return constants.IMR_ASYMPTOMATIC
-                    else:
-                        if health_status == constants.HEALTHY: # only healthy people can be immune
-                            return constants.IMR_IMMUNE
-                        else:
-                            return constants.IMR_ASYMPTOMATIC
-        value = random.random()
-        if age <= 9:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[0], health_status)
-        elif age > 9 and age <= 19:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[1], health_status)
-        elif age > 19 and age <= 29:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[2], health_status)
-        elif age > 29 and age <= 39:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[3], health_status)
-        elif age > 39 and age <= 49:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[4], health_status)
-        elif age > 49 and age <= 59:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[5], health_status)
-        elif age > 59 and age <= 69:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[6], health_status)
-        elif age > 69 and age <= 79:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[7], health_status)
-        elif age > 79:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[8], health_status)
+        return disease.immune_response(age, health_status, rng.random())
@@ -0,0 +1,4 @@
+import os
+
+# the modules read the configuration and data files relative to the src folder
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
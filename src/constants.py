@@ -15,6 +15,8 @@ graphic_sizes = config['SIMULATION']['VISUALIZATION']['PARAMS']['SIZES']
 LOG_LEVEL = config['LOG_LEVEL']
 APP_NAME = config['APP_NAME']
 EPISODES = simulation['EPISODES']
+# seed of the random numbers, None for a random seed
+SEED = simulation['SEED']
 TOTAL_NUMBER_OF_AGENTS = simulation['TOTAL_NUMBER_OF_AGENTS']
 TRAVELLING_NUMBER_OF_AGENTS = simulation['TRAVELLING_NUMBER_OF_AGENTS']
 
@@ -64,6 +66,9 @@ QUARANTINE_PERCENTAGE = simulation['QUARANTINE_PERCENTAGE']
 QUARANTINE_DAYS = simulation['QUARANTINE_DAYS']
 
 
+# agents have a name, only used in the debug logs
+AGENT_NAMES = agent['AGENT_NAMES']
+
 # probabilities of being of one type in random simulation with no static values
 HEALTH_ARRAY_P = [agent['HEALTH_ARRAY_SICK_P'],
                   agent['HEALTH_ARRAY_ASYMP_P'], agent['HEALTH_ARRAY_HEALTHY_P']]
@@ -82,8 +87,16 @@ SOCIAL_DISTANCE = agent['SOCIAL_DISTANCE']
 SOCIAL_DISTANCE_STEP = agent['SOCIAL_DISTANCE_STEP']
 # distance that triggers a possible contagious if one of the agents is infected
 CONTAGIOUS_DISTANCE = agent['CONTAGIOUS_DISTANCE']
+# contacts are evaluated only around the infectious agents instead of around every agent
+PUSH_CONTACTS = agent['PUSH_CONTACTS']
+# each agent adds up the infection probabilities of all its contacts of the day and uses a single random draw
+COMBINED_HAZARD = agent['COMBINED_HAZARD']
+# Mesa model only: the contacts of each agent come from a map of the infectious agents summed over the contagious radius
+PRESSURE_MAP = agent['PRESSURE_MAP']
 # number of times the agent tries to keep the social distance until quit
 SOCIAL_DISTANCE_TRIES = agent['SOCIAL_DISTANCE_TRIES']
+# number of random positions an agent tries when moving with social distance until it stays where it is
+RANDOM_STEP_TRIES = agent['RANDOM_STEP_TRIES']
 
 # after X days agents recover
 INFECTED_DAYS_THRESHOLD_FOR_INFECTED = agent['INFECTED_DAYS_THRESHOLD_FOR_INFECTED']
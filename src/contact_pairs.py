@@ -0,0 +1,140 @@
+from contacts import CONTACT_LIMIT, CONTACT_STENCIL_X, CONTACT_STENCIL_Y, in_contact, limit_stencil
+import numpy as np
+import math
+import time
+
+
+def radix_argsort(keys):
+    """Returns the indexes that sort the keys, with a LSD radix sort: a stable sort of each 16 bits digit, from the lowest one.
+    NumPy sorts 16 bits integers with a counting sort, so the cost grows with the number of keys and the number of digits
+
+    Args:
+        keys (Array): Non negative integer keys
+
+    Returns:
+        (Array): Indexes of the keys in sorted order
+    """
+    order = np.arange(len(keys))
+    if len(keys) == 0:
+        return order
+    max_key = int(keys.max())
+    shift = 0
+    while True:
+        digits = ((keys[order] >> shift) & 0xFFFF).astype(np.uint16)
+        order = order[np.argsort(digits, kind="stable")]
+        shift += 16
+        if max_key >> shift == 0:
+            return order
+
+
+def cell_list_pairs(pos_X, pos_Y, sources=None, targets=None, limit=CONTACT_LIMIT):
+    """Returns all the pairs of agents inside the contagious range, with a cell list.
+
+    The target agents are bucketed by position with a radix sort, keeping only the occupied positions, so the buckets do not depend
+    on the size of the world. The contacts of each source agent are then found by walking the contact stencil from its position:
+    each offset of the stencil is one lookup of the bucket at that position, without computing any distance
+
+    Args:
+        pos_X (Array): X axis position of each agent
+        pos_Y (Array): Y axis position of each agent
+        sources (Array, optional): Indexes of the agents whose contacts we are looking for. Defaults to None, all the agents.
+        targets (Array, optional): Indexes of the agents that can be in contact with the sources. Defaults to None, all the agents.
+        limit (Integer, optional): Largest squared distance in contact. Defaults to CONTACT_LIMIT.
+
+    Returns:
+        (Array), (Array): Source and target index of each pair
+    """
+    empty = np.zeros(0, dtype=np.int64)
+    sources = np.arange(len(pos_X)) if sources is None else np.asarray(sources, dtype=np.int64)
+    targets = np.arange(len(pos_X)) if targets is None else np.asarray(targets, dtype=np.int64)
+    if len(sources) == 0 or len(targets) == 0 or limit <= 0:
+        return empty, empty
+
+    if limit == CONTACT_LIMIT:
+        offsets_X, offsets_Y = CONTACT_STENCIL_X, CONTACT_STENCIL_Y
+    else:
+        offsets_X, offsets_Y = limit_stencil(limit)
+
+    src_X = np.asarray(pos_X)[sources].astype(np.int64)
+    src_Y = np.asarray(pos_Y)[sources].astype(np.int64)
+    tgt_X = np.asarray(pos_X)[targets].astype(np.int64)
+    tgt_Y = np.asarray(pos_Y)[targets].astype(np.int64)
+
+    # giving a unique key to each position, with a margin of the stencil radius so the walked positions have keys too
+    radius = math.isqrt(limit)
+    min_X = min(src_X.min(), tgt_X.min()) - radius
+    min_Y = min(src_Y.min(), tgt_Y.min()) - radius
+    height = int(max(src_Y.max(), tgt_Y.max()) - min_Y) + radius + 1
+    src_keys = (src_X - min_X) * height + (src_Y - min_Y)
+    # the sources are walked in key order, so the stencil lookups read the buckets in order
+    src_order = radix_argsort(src_keys)
+    sources = sources[src_order]
+    src_keys = src_keys[src_order]
+    tgt_keys = (tgt_X - min_X) * height + (tgt_Y - min_Y)
+
+    # one bucket for each occupied position: its key, its start in the sorted targets and its number of targets
+    order = radix_argsort(tgt_keys)
+    sorted_keys = tgt_keys[order]
+    starts = np.flatnonzero(np.diff(sorted_keys, prepend=-1))
+    cell_keys = sorted_keys[starts]
+    counts = np.diff(starts, append=len(sorted_keys))
+
+    pairs_src = []
+    pairs_tgt = []
+    for x_ax, y_ax in zip(offsets_X.tolist(), offsets_Y.tolist()):
+        keys = src_keys + (x_ax * height + y_ax)
+        cells = np.minimum(np.searchsorted(cell_keys, keys), len(cell_keys) - 1)
+        cell_counts = np.where(cell_keys[cells] == keys, counts[cells], 0)
+        total = int(cell_counts.sum())
+        if total == 0:
+            continue
+        within = np.arange(total) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+        pairs_src.append(sources[np.repeat(np.arange(len(sources)), cell_counts)])
+        pairs_tgt.append(targets[order[np.repeat(starts[cells], cell_counts) + within]])
+
+    if not pairs_src:
+        return empty, empty
+    return np.concatenate(pairs_src), np.concatenate(pairs_tgt)
+
+
+def brute_force_pairs(pos_X, pos_Y, limit=CONTACT_LIMIT):
+    """Returns all the pairs of agents inside the contagious range, checking every pair of agents. Only used to test cell_list_pairs
+
+    Args:
+        pos_X (Array): X axis position of each agent
+        pos_Y (Array): Y axis position of each agent
+        limit (Integer, optional): Largest squared distance in contact. Defaults to CONTACT_LIMIT.
+
+    Returns:
+        (Set): (source, target) index of each pair
+    """
+    pairs = set()
+    for i, (x_0, y_0) in enumerate(zip(pos_X, pos_Y)):
+        for j, (x_1, y_1) in enumerate(zip(pos_X, pos_Y)):
+            if in_contact(x_0 - x_1, y_0 - y_1, limit):
+                pairs.add((i, j))
+    return pairs
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+
+    # linear scaling: same density, growing number of agents
+    for total in (10_000, 40_000, 160_000, 640_000):
+        size = int(math.sqrt(total / 0.1))
+        pos_X = rng.integers(0, size, total)
+        pos_Y = rng.integers(0, size, total)
+        start = time.perf_counter()
+        pairs_src, _ = cell_list_pairs(pos_X, pos_Y)
+        elapsed = time.perf_counter() - start
+        print(f"{total:>8} agents {len(pairs_src):>8} pairs {elapsed * 1000:8.1f} ms {elapsed / total * 1e9:6.0f} ns/agent")
+
+    # the world grows faster than the population: the buckets are only the occupied positions, so the cost stays with the agents
+    total = 40_000
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        pos_X = rng.integers(0, size, total)
+        pos_Y = rng.integers(0, size, total)
+        start = time.perf_counter()
+        pairs_src, _ = cell_list_pairs(pos_X, pos_Y)
+        elapsed = time.perf_counter() - start
+        print(f"{total:>8} agents in a {size:>9} wide world {len(pairs_src):>6} pairs {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,76 @@
+import constants
+import math
+import numpy as np
+
+
+def max_squared_distance(contagious_distance):
+    """Returns the largest squared distance between two grid positions that is still inside the contagious range.
+    Positions are integers, so dist < contagious_distance is the same as dx * dx + dy * dy <= max_squared_distance
+
+    Args:
+        contagious_distance (Float): Distance below which two agents are in contact
+
+    Returns:
+        (Integer): Largest squared distance in contact
+    """
+    limit = max(0, math.ceil(contagious_distance * contagious_distance) - 1)
+    # correcting the rounding of the square, so the limit agrees with comparing the float distance
+    while limit > 0 and math.sqrt(limit) >= contagious_distance:
+        limit -= 1
+    while math.sqrt(limit + 1) < contagious_distance:
+        limit += 1
+    return limit
+
+
+def contact_stencil(contagious_distance):
+    """Returns the offsets, on each axis, of all the positions in contact with the position (0, 0), the position itself excluded.
+    Walking the stencil from a position gives its neighbours without computing any distance
+
+    Args:
+        contagious_distance (Float): Distance below which two agents are in contact
+
+    Returns:
+        offsets_X (Array), offsets_Y (Array): X and Y offsets, sorted by distance
+    """
+    return limit_stencil(max_squared_distance(contagious_distance))
+
+
+def limit_stencil(limit):
+    """Returns the offsets, on each axis, of all the positions whose squared distance to the position (0, 0) is not above limit,
+    the position itself excluded
+
+    Args:
+        limit (Integer): Largest squared distance in contact
+
+    Returns:
+        offsets_X (Array), offsets_Y (Array): X and Y offsets, sorted by distance
+    """
+    radius = math.isqrt(limit)
+    offsets = [(x_ax, y_ax)
+               for x_ax in range(-radius, radius + 1)
+               for y_ax in range(-radius, radius + 1)
+               if 0 < x_ax * x_ax + y_ax * y_ax <= limit]
+    offsets.sort(key=lambda offset: offset[0] * offset[0] + offset[1] * offset[1])
+    return (np.array([x_ax for x_ax, _ in offsets], dtype=np.int64),
+            np.array([y_ax for _, y_ax in offsets], dtype=np.int64))
+
+
+# computed only once for the configured contagious distance
+CONTACT_LIMIT = max_squared_distance(constants.CONTAGIOUS_DISTANCE)
+CONTACT_STENCIL_X, CONTACT_STENCIL_Y = contact_stencil(constants.CONTAGIOUS_DISTANCE)
+
+
+def in_contact(d_X, d_Y, limit=CONTACT_LIMIT):
+    """Checks if two positions are in contact: not the same position and inside the contagious range.
+    Works with integers and with arrays of candidate pairs
+
+    Args:
+        d_X (Integer or Array): Difference between the X axis positions
+        d_Y (Integer or Array): Difference between the Y axis positions
+        limit (Integer, optional): Largest squared distance in contact. Defaults to CONTACT_LIMIT.
+
+    Returns:
+        (Boolean or Array): True for the positions in contact
+    """
+    squared = d_X * d_X + d_Y * d_Y
+    return (squared != 0) & (squared <= limit)
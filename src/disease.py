@@ -0,0 +1,460 @@
+import constants
+import bisect
+import numpy as np
+
+# value used in the arrays for the agents with no infected days or no previous health status
+NONE_VALUE = -1
+
+# actions applied to an infected agent in each day, based on its number of days with the virus
+PASS_DAY = 0  # one more day with the virus
+START = 1  # first day with the virus, from None to 0
+RECOVER = 2  # infected threshould where people recover
+DIE = 3  # case of deadly infected
+NOT_CONTAGIOUS = 4  # infected threshould where people stop being contagious
+
+
+def build_progression_table():
+    """Builds the table with the action for each number of infected days. The position 0 is for the agents with no infected days (None)
+
+    The thresholds are written from the lowest to the highest priority, so when two thresholds have the same number of days the action with the highest priority is kept.
+
+    Returns:
+        (Array): Action for each number of infected days plus one. The last position is used for all days after the thresholds
+    """
+    max_days = max(constants.INFECTED_DAYS_THRESHOLD_FOR_INFECTED, constants.INFECTED_DAYS_THRESHOLD_FOR_DEAD,
+                   constants.INFECTED_DAYS_THRESHOLD_FOR_NOT_CONTAGIOUS)
+    table = np.full(max_days + 3, PASS_DAY, dtype=np.int8)
+    table[constants.INFECTED_DAYS_THRESHOLD_FOR_NOT_CONTAGIOUS + 1] = NOT_CONTAGIOUS
+    table[constants.INFECTED_DAYS_THRESHOLD_FOR_DEAD + 1] = DIE
+    table[constants.INFECTED_DAYS_THRESHOLD_FOR_INFECTED + 1] = RECOVER
+    table[NONE_VALUE + 1] = START
+    return table
+
+
+PROGRESSION_TABLE = build_progression_table()
+
+
+def build_progression_milestones():
+    """Builds the list of days, counted from the day 0 of an infection, when the progression table has an action for the agent.
+    The action of the position i of the table is applied i days after the day 0, as the day 0 is the position 0
+
+    The first day after the day 0 is always a milestone, when the agent starts being contagious, with the PASS_DAY action if it has no other.
+
+    Returns:
+        (List): (days after the day 0, action) for each milestone, sorted by days
+    """
+    milestones = [(days, action) for days, action in enumerate(PROGRESSION_TABLE.tolist())
+                  if days > 0 and action != PASS_DAY]
+    if not milestones or milestones[0][0] != 1:
+        milestones.insert(0, (1, PASS_DAY))
+    return milestones
+
+
+PROGRESSION_MILESTONES = build_progression_milestones()
+
+
+def progress_infections(health_status, previous_health_status, infected_days, immune_system_response, rng=np.random):
+    """Updates the infected agents health status based on the number of days with the virus. All agents are updated at once
+
+    The arrays must only have the agents that are SICK or ASYMPTOMATIC and not recovered. They are updated in place.
+
+    Args:
+        health_status (Array): Agents' health status
+        previous_health_status (Array): Agents' previous health status, NONE_VALUE when there is none
+        infected_days (Array): Agents' number of days with the virus, NONE_VALUE when they were just infected
+        immune_system_response (Array): Agents' immune system response type
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        started (Array), recovered (Array), dead (Array): True for the agents that got their day 0, recovered and died
+    """
+    actions = PROGRESSION_TABLE[np.minimum(infected_days + 1, len(PROGRESSION_TABLE) - 1)]
+    started = actions == START
+    recovered = actions == RECOVER
+    dead = (actions == DIE) & (immune_system_response == constants.IMR_DEADLY_INFECTED)
+    better = (actions == NOT_CONTAGIOUS) & (health_status != constants.ASYMPTOMATIC)
+
+    # previous here is because people change to asymptomatic
+    was_sick = recovered & ((health_status == constants.SICK) |
+                            (previous_health_status == constants.SICK))
+    with_sequels = np.zeros(len(health_status), dtype=bool)
+    with_sequels[was_sick] = rng.random(np.count_nonzero(was_sick)) < constants.RECOVERY_SEQUELS_P
+
+    health_status[recovered] = constants.TOTAL_RECOVERY
+    health_status[with_sequels] = constants.WITH_DISEASES_SEQUELAES
+    health_status[dead] = constants.DEAD
+    previous_health_status[better] = constants.SICK
+    health_status[better] = constants.ASYMPTOMATIC
+
+    infected_days[~started & ~recovered] += 1
+    infected_days[started] = 0
+
+    return started, recovered, dead
+
+
+def progress_agent_infections(agents, rng=np.random):
+    """Updates the health status of a list of infected agents based on the number of days with the virus, using the progress_infections function
+
+    Args:
+        agents (List): SICK or ASYMPTOMATIC agents, not recovered, with the health_status, previous_health_status, infected_days and immune_system_response attributes
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        started (List), recovered (List), dead (List): Agents that got their day 0, recovered and died
+    """
+    if not agents:
+        return [], [], []
+
+    health_status = np.array([agent.health_status for agent in agents], dtype=np.int8)
+    previous_health_status = np.array([NONE_VALUE if agent.previous_health_status is None else agent.previous_health_status
+                                       for agent in agents], dtype=np.int8)
+    infected_days = np.array([NONE_VALUE if agent.infected_days is None else agent.infected_days
+                              for agent in agents], dtype=np.int16)
+    immune_system_response = np.array([agent.immune_system_response for agent in agents], dtype=np.int8)
+
+    started, recovered, dead = progress_infections(
+        health_status, previous_health_status, infected_days, immune_system_response, rng)
+
+    for agent, hs, previous_hs, days, has_recovered in zip(agents, health_status.tolist(), previous_health_status.tolist(),
+                                                           infected_days.tolist(), recovered.tolist()):
+        agent.health_status = hs
+        agent.previous_health_status = None if previous_hs == NONE_VALUE else previous_hs
+        agent.infected_days = days
+        if has_recovered:
+            agent.recovered = True
+
+    return ([agent for agent, value in zip(agents, started.tolist()) if value],
+            [agent for agent, value in zip(agents, recovered.tolist()) if value],
+            [agent for agent, value in zip(agents, dead.tolist()) if value])
+
+
+def build_transmission_table():
+    """Builds the table with the outcome of a contact between an agent and an infected one, for each contact health status, immune system response,
+    contact mask and own mask. The same rules as Simulation.value_based_probability, computed once
+
+    A random value between 0 and 1 is mapped to an outcome by counting the thresholds below it:
+
+    0__INFECTED__|SICK_P·m|__HEALTHY__|+HEALTHY_P·m|__NO CHANGE__|1-ASYMPTOMATIC_P·m|__INFECTED__1
+
+    Returns:
+        thresholds (Array), outcomes (Array): Three cumulative thresholds and four health status outcomes (-1 when it does not change) for each case
+    """
+    thresholds = np.zeros((len(constants.HEALTH_STATUS_DICT), len(constants.IMR_DICT), 2, 2, 3))
+    outcomes = np.full((len(constants.HEALTH_STATUS_DICT), len(constants.IMR_DICT), 2, 2, 4), -1, dtype=np.int8)
+
+    for contact_mask in (0, 1):
+        for own_mask in (0, 1):
+            # using mask reduces the spread, only the contact mask is used when both agents wear it
+            if contact_mask:
+                mask_value = constants.CONTAGIOUS_AGENT_MASK
+            elif own_mask:
+                mask_value = constants.CONTAGIOUS_AGENT_MASK_HEALTHY_MASK
+            else:
+                mask_value = constants.CONTAGIOUS_AGENT_NO_MASK_HEALTHY_NO_MASK
+
+            sick_limit = constants.SICK_P * mask_value
+            healthy_limit = sick_limit + constants.HEALTHY_P * mask_value
+            # the last threshold is moved just below 1 - ASYMPTOMATIC_P·m as a random value equal to it infects the agent
+            asymp_limit = max(healthy_limit, np.nextafter(1 - constants.ASYMPTOMATIC_P * mask_value, -np.inf))
+            thresholds[:, :, contact_mask, own_mask] = (sick_limit, healthy_limit, asymp_limit)
+
+            # only SICK or ASYMPTOMATIC agents infect, and only non immune agents get infected
+            for health_status in (constants.SICK, constants.ASYMPTOMATIC):
+                for immune_system_response in constants.IMR_DICT:
+                    if immune_system_response == constants.IMR_IMMUNE:
+                        continue
+                    infected = constants.SICK if immune_system_response > constants.IMR_ASYMPTOMATIC else constants.ASYMPTOMATIC
+                    outcomes[health_status, immune_system_response, contact_mask, own_mask] = (
+                        infected, constants.HEALTHY, -1, infected)
+
+    return thresholds, outcomes
+
+
+TRANSMISSION_THRESHOLDS, TRANSMISSION_OUTCOMES = build_transmission_table()
+# the same tables as lists, faster to index one contact at a time
+TRANSMISSION_THRESHOLDS_LIST = TRANSMISSION_THRESHOLDS.tolist()
+TRANSMISSION_OUTCOMES_LIST = TRANSMISSION_OUTCOMES.tolist()
+
+
+def transmission_outcome(health_status, immune_system_response, wear_mask_agent_in_contact, wear_mask_current_agent, random_value):
+    """Returns the agent new health status after a contact, looking up the transmission table
+
+    Args:
+        health_status (Integer): Health status of agent in contact with
+        immune_system_response (Integer): Current agent imune response type
+        wear_mask_agent_in_contact (Boolean): If agent in contact wears a mask
+        wear_mask_current_agent (Boolean): If current agent wears a mask
+        random_value (Float): Random value between 0 and 1
+
+    Returns:
+        (Integer): Agent new health status, -1 when it does not change
+    """
+    (sick_limit, healthy_limit, asymp_limit) = \
+        TRANSMISSION_THRESHOLDS_LIST[health_status][immune_system_response][wear_mask_agent_in_contact][wear_mask_current_agent]
+    index = (random_value > sick_limit) + (random_value > healthy_limit) + (random_value > asymp_limit)
+    return TRANSMISSION_OUTCOMES_LIST[health_status][immune_system_response][wear_mask_agent_in_contact][wear_mask_current_agent][index]
+
+
+def transmission_outcomes(health_status, immune_system_response, wear_mask_agent_in_contact, wear_mask_current_agent, random_value):
+    """Returns the agents new health status for an array of contacts, looking up the transmission table for all of them at once
+
+    Args:
+        health_status (Array): Health status of agents in contact with
+        immune_system_response (Array): Current agents imune response type
+        wear_mask_agent_in_contact (Array): If agents in contact wear a mask
+        wear_mask_current_agent (Array): If current agents wear a mask
+        random_value (Array): Random values between 0 and 1
+
+    Returns:
+        (Array): Agents new health status, -1 when it does not change
+    """
+    case = (health_status, immune_system_response, wear_mask_agent_in_contact.astype(np.intp), wear_mask_current_agent.astype(np.intp))
+    index = np.count_nonzero(random_value[:, np.newaxis] > TRANSMISSION_THRESHOLDS[case], axis=1)
+    return TRANSMISSION_OUTCOMES[case + (index,)]
+
+
+def build_hazard_table():
+    """Builds, from the transmission table, the probability of each outcome of a single contact:
+    q, the contact infects the agent, and h, the contact makes the agent HEALTHY (the rest, 1 - q - h, does not change it)
+
+    Returns:
+        infection (Array), healing (Array): q and h for each contact health status, immune system response, contact mask and own mask
+    """
+    sick_limit = TRANSMISSION_THRESHOLDS[..., 0]
+    healthy_limit = TRANSMISSION_THRESHOLDS[..., 1]
+    asymp_limit = TRANSMISSION_THRESHOLDS[..., 2]
+    transmits = TRANSMISSION_OUTCOMES[..., 0] != -1
+    infection = np.where(transmits, sick_limit + (1 - asymp_limit), 0.0)
+    healing = np.where(transmits, healthy_limit - sick_limit, 0.0)
+    return infection, healing
+
+
+HAZARD_INFECTION, HAZARD_HEALING = build_hazard_table()
+# the same tables as lists, faster to index one contact at a time
+HAZARD_INFECTION_LIST = HAZARD_INFECTION.tolist()
+HAZARD_HEALING_LIST = HAZARD_HEALING.tolist()
+
+
+def infected_status(immune_system_response):
+    """Returns the health status of an agent that gets the virus
+
+    Args:
+        immune_system_response (Integer): Agent imune response type
+
+    Returns:
+        (Integer): SICK, or ASYMPTOMATIC for the asymptomatic immune system response
+    """
+    return constants.SICK if immune_system_response > constants.IMR_ASYMPTOMATIC else constants.ASYMPTOMATIC
+
+
+def combined_transmission_outcome(contacts, immune_system_response, wear_mask_current_agent, random_value, first_outcome=True):
+    """Returns the agent new health status after all its contacts of the day, with a single random value.
+
+    With q_k and h_k the probabilities of contact k infecting the agent and making it HEALTHY, drawing each contact in turn gives:
+
+    * first_outcome=True, the agent takes the first contact that changes it (Simulation):
+      P(change) = 1 - Π(1 - q_k - h_k). Every q_k / h_k ratio is SICK_P + ASYMPTOMATIC_P to HEALTHY_P, whatever the masks,
+      so the change is an infection with probability Σq_k / Σ(q_k + h_k), independently of the contacts order
+    * first_outcome=False, every contact is drawn until the agent is infected (SimulationAgent):
+      P(infected) = 1 - Π(1 - q_k) and P(HEALTHY) = Π(1 - q_k) - Π(1 - q_k - h_k)
+
+    The random value is mapped as 0__INFECTED__|P(infected)|__HEALTHY__|P(infected) + P(HEALTHY)|__NO CHANGE__1
+
+    Args:
+        contacts (List): (health status, wear mask) of each infectious agent in contact with
+        immune_system_response (Integer): Current agent imune response type
+        wear_mask_current_agent (Boolean): If current agent wears a mask
+        random_value (Float): Random value between 0 and 1
+        first_outcome (Boolean, optional): If the agent takes the first contact that changes it. Defaults to True.
+
+    Returns:
+        (Integer): Agent new health status, -1 when it does not change
+    """
+    no_infection = 1.0
+    no_change = 1.0
+    infection_total = 0.0
+    healing_total = 0.0
+    for (health_status, wear_mask) in contacts:
+        infection = HAZARD_INFECTION_LIST[health_status][immune_system_response][wear_mask][wear_mask_current_agent]
+        healing = HAZARD_HEALING_LIST[health_status][immune_system_response][wear_mask][wear_mask_current_agent]
+        no_infection *= 1 - infection
+        no_change *= 1 - infection - healing
+        infection_total += infection
+        healing_total += healing
+
+    if infection_total + healing_total == 0:
+        return -1
+    if first_outcome:
+        infected_limit = (1 - no_change) * infection_total / (infection_total + healing_total)
+    else:
+        infected_limit = 1 - no_infection
+
+    if random_value < infected_limit:
+        return infected_status(immune_system_response)
+    if random_value < 1 - no_change:
+        return constants.HEALTHY
+    return -1
+
+
+def combined_transmission_outcomes(targets, health_status, immune_system_response, wear_mask_agent_in_contact, wear_mask_current_agent, rng=np.random):
+    """Returns the new health status of the agents after all their contacts of the day, with a single random value for each agent.
+    The same as combined_transmission_outcome with first_outcome=True, for arrays of contacts
+
+    Args:
+        targets (Array): Agent of each contact
+        health_status (Array): Health status of agents in contact with
+        immune_system_response (Array): Agents imune response type
+        wear_mask_agent_in_contact (Array): If agents in contact wear a mask
+        wear_mask_current_agent (Array): If agents wear a mask
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        agents (Array), new_health_status (Array): Agents with at least one contact, sorted, and their new health status, -1 when it does not change
+    """
+    case = (health_status, immune_system_response, wear_mask_agent_in_contact.astype(np.intp), wear_mask_current_agent.astype(np.intp))
+    infection = HAZARD_INFECTION[case]
+    healing = HAZARD_HEALING[case]
+
+    agents, first, contact_agent = np.unique(targets, return_index=True, return_inverse=True)
+    # products of the probabilities as sums of logarithms, a contact that always changes the agent gives log(0)
+    with np.errstate(divide="ignore"):
+        no_change = np.exp(np.bincount(contact_agent, np.log1p(-(infection + healing)), minlength=len(agents)))
+    infection_total = np.bincount(contact_agent, infection, minlength=len(agents))
+    change_total = infection_total + np.bincount(contact_agent, healing, minlength=len(agents))
+    infected_limit = np.divide((1 - no_change) * infection_total, change_total, out=np.zeros(len(agents)), where=change_total > 0)
+
+    random_value = rng.random(len(agents))
+    new_health_status = np.full(len(agents), -1, dtype=np.int8)
+    new_health_status[random_value < 1 - no_change] = constants.HEALTHY
+    infected = random_value < infected_limit
+    new_health_status[infected] = np.where(
+        immune_system_response[first[infected]] > constants.IMR_ASYMPTOMATIC, constants.SICK, constants.ASYMPTOMATIC)
+    return agents, new_health_status
+
+
+# (health status, wear mask) of the infectious agents counted in each layer of an infection pressure map
+PRESSURE_LAYERS = [(constants.SICK, False), (constants.SICK, True), (constants.ASYMPTOMATIC, False), (constants.ASYMPTOMATIC, True)]
+
+
+def pressure_layer(health_status, wear_mask):
+    """Returns the infection pressure map layer of an infectious agent
+
+    Args:
+        health_status (Integer): SICK or ASYMPTOMATIC
+        wear_mask (Boolean): If the agent wears a mask
+
+    Returns:
+        (Integer): Index in PRESSURE_LAYERS
+    """
+    return 2 * health_status + wear_mask
+
+
+def pressure_transmission_outcomes(pressure, immune_system_response, wear_mask_current_agent, rng=np.random):
+    """Returns the new health status of the agents from the number of infectious agents of each layer in contact with them,
+    with a single random value for each agent in contact with at least one.
+    The same as combined_transmission_outcome with first_outcome=False, n contacts of a layer giving (1 - q)^n and (1 - q - h)^n
+
+    Args:
+        pressure (Array): Number of infectious agents of each layer of PRESSURE_LAYERS (columns) in contact with each agent (rows)
+        immune_system_response (Array): Agents imune response type
+        wear_mask_current_agent (Array): If agents wear a mask
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        (Array): Agents new health status, -1 when it does not change
+    """
+    own_mask = wear_mask_current_agent.astype(np.intp)
+    log_no_infection = np.zeros(len(pressure))
+    log_no_change = np.zeros(len(pressure))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for layer, (health_status, wear_mask) in enumerate(PRESSURE_LAYERS):
+            count = pressure[:, layer]
+            infection = HAZARD_INFECTION[health_status, immune_system_response, int(wear_mask), own_mask]
+            healing = HAZARD_HEALING[health_status, immune_system_response, int(wear_mask), own_mask]
+            # a contact that always changes the agent gives log(0), only used when there are contacts of that layer
+            log_no_infection += np.where(count > 0, count * np.log1p(-infection), 0.0)
+            log_no_change += np.where(count > 0, count * np.log1p(-(infection + healing)), 0.0)
+
+    new_health_status = np.full(len(pressure), -1, dtype=np.int8)
+    in_contact = np.flatnonzero(pressure.any(axis=1))
+    random_value = rng.random(len(in_contact))
+    new_health_status[in_contact[random_value < 1 - np.exp(log_no_change[in_contact])]] = constants.HEALTHY
+    infected = in_contact[random_value < 1 - np.exp(log_no_infection[in_contact])]
+    new_health_status[infected] = np.where(
+        immune_system_response[infected] > constants.IMR_ASYMPTOMATIC, constants.SICK, constants.ASYMPTOMATIC)
+    return new_health_status
+
+
+# highest age of each age band of constants.AGE_P_DIR_ARRAY, the last band has no upper limit
+AGE_BAND_LIMITS = [9, 19, 29, 39, 49, 59, 69, 79]
+# immune system response of each category of the immune response table, the last one is only IMMUNE for HEALTHY agents
+IMR_CATEGORIES = np.array([constants.IMR_DEADLY_INFECTED, constants.IMR_MODERATELY_INFECTED, constants.IMR_SEVERE_INFECTED,
+                           constants.IMR_ASYMPTOMATIC, constants.IMR_IMMUNE], dtype=np.int8)
+
+
+def build_immune_response_table():
+    """Builds the cumulative probabilities of the immune system response categories for each age band, computed once
+
+    A random value between 0 and 1 is mapped to a category by counting the thresholds below or equal to it:
+
+    0______|P_DIR|_______1 gives DEADLY, else:
+
+    0__|ADM_HOSP_P|____|ADM_HOSP_P + ADM_HOSP_ICU_P|___|19.8/20|___|0.2/20|__1
+       MODERATE          SEVERE                         ASYMPTOMATIC  IMMUNE (ASYMPTOMATIC if not HEALTHY)
+
+    Returns:
+        (Array): Four cumulative thresholds for each age band
+    """
+    table = np.zeros((len(constants.AGE_P_DIR_ARRAY), len(IMR_CATEGORIES) - 1))
+    hospital_limit = constants.ADM_HOSP_P + constants.ADM_HOSP_ICU_P
+    for band, pdir in enumerate(constants.AGE_P_DIR_ARRAY):
+        # the random value is compared with 19.8/20 of 1 - P_DIR, but it is not scaled by 1 - P_DIR
+        asymptomatic_limit = max(hospital_limit, 19.8 * ((1 - pdir) / 20))
+        probabilities = np.array([constants.ADM_HOSP_P, constants.ADM_HOSP_ICU_P, asymptomatic_limit - hospital_limit]) * (1 - pdir)
+        table[band] = np.cumsum(np.concatenate(([pdir], probabilities)))
+    return table
+
+
+IMMUNE_RESPONSE_TABLE = build_immune_response_table()
+# the same table as a list, faster to look up one agent at a time
+IMMUNE_RESPONSE_TABLE_LIST = IMMUNE_RESPONSE_TABLE.tolist()
+IMR_CATEGORIES_LIST = IMR_CATEGORIES.tolist()
+
+
+def immune_response(age, health_status, random_value):
+    """Returns the immune system response type of an agent according to its age, looking up the immune response table
+
+    Args:
+        age (Integer): Agent's age
+        health_status (Integer): Agent's health status
+        random_value (Float): Random value between 0 and 1
+
+    Returns:
+        (Integer): Immune system response type
+    """
+    thresholds = IMMUNE_RESPONSE_TABLE_LIST[bisect.bisect_left(AGE_BAND_LIMITS, age)]
+    immune_system_response = IMR_CATEGORIES_LIST[bisect.bisect_right(thresholds, random_value)]
+    # only healthy people can be immune
+    if immune_system_response == constants.IMR_IMMUNE and health_status != constants.HEALTHY:
+        return constants.IMR_ASYMPTOMATIC
+    return immune_system_response
+
+
+def immune_responses(ages, health_status, rng=np.random):
+    """Returns the immune system response type of each agent according to its age, looking up the immune response table for all of them at once
+
+    Args:
+        ages (Array): Agents' age
+        health_status (Array): Agents' health status
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        (Array): Immune system response types
+    """
+    thresholds = IMMUNE_RESPONSE_TABLE[np.searchsorted(AGE_BAND_LIMITS, ages, side="left")]
+    category = np.count_nonzero(rng.random(len(thresholds))[:, np.newaxis] >= thresholds, axis=1)
+    immune_system_response = IMR_CATEGORIES[category]
+    # only healthy people can be immune
+    immune_system_response[(immune_system_response == constants.IMR_IMMUNE) &
+                           (np.asarray(health_status) != constants.HEALTHY)] = constants.IMR_ASYMPTOMATIC
+    return immune_system_response
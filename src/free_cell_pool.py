@@ -0,0 +1,110 @@
+import random
+import logging
+import sys
+
+
+class FreeCellPool:
+    """Pool with the empty cells of the environment. Drawing a random free cell, occupying it and releasing it take constant time
+    """
+    def __init__(self, low, high, high_Y=None):
+        """FreeCellPool constructor. All the cells start free
+
+        Args:
+            low (Integer): Lowest position on each axis
+            high (Integer): Highest position on each axis, included
+            high_Y (Integer, optional): Highest position on the y axis, included. Defaults to None, the same as high.
+        """
+        self.low = low
+        self.high = high
+        self.high_Y = high if high_Y is None else high_Y
+        self.free = [(x_ax, y_ax) for x_ax in range(low, high + 1) for y_ax in range(low, self.high_Y + 1)]
+        # position of each free cell in the free list, so it can be removed by swapping it with the last one
+        self.index = {cell: i for i, cell in enumerate(self.free)}
+        # number of agents in each occupied cell
+        self.occupied = {}
+
+    def __len__(self):
+        """Number of free cells
+
+        Returns:
+            (Integer): Number of free cells
+        """
+        return len(self.free)
+
+    def in_pool(self, pos_X, pos_Y):
+        """Checks if a position belongs to the pool. Positions out of the pool, like the quarantine zone, are ignored
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+
+        Returns:
+            (Boolean): True if the position is between low and high on both axis
+        """
+        return self.low <= pos_X <= self.high and self.low <= pos_Y <= self.high_Y
+
+    def occupy(self, pos_X, pos_Y):
+        """Adds an agent to a cell, removing the cell from the free ones
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+        """
+        if not self.in_pool(pos_X, pos_Y):
+            return
+
+        cell = (pos_X, pos_Y)
+        if cell in self.index:
+            i = self.index.pop(cell)
+            last = self.free.pop()
+            if last != cell:
+                self.free[i] = last
+                self.index[last] = i
+        self.occupied[cell] = self.occupied.get(cell, 0) + 1
+
+    def release(self, pos_X, pos_Y):
+        """Removes an agent from a cell, returning the cell to the free ones when it becomes empty
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+        """
+        if not self.in_pool(pos_X, pos_Y):
+            return
+
+        cell = (pos_X, pos_Y)
+        if self.occupied[cell] == 1:
+            del self.occupied[cell]
+            self.index[cell] = len(self.free)
+            self.free.append(cell)
+        else:
+            self.occupied[cell] -= 1
+
+    def move(self, pos_X, pos_Y, new_pos_X, new_pos_Y):
+        """Moves an agent from a cell to another
+
+        Args:
+            pos_X (Integer): Current x axis position
+            pos_Y (Integer): Current y axis position
+            new_pos_X (Integer): New x axis position
+            new_pos_Y (Integer): New y axis position
+        """
+        if (pos_X, pos_Y) != (new_pos_X, new_pos_Y):
+            self.release(pos_X, pos_Y)
+            self.occupy(new_pos_X, new_pos_Y)
+
+    def random_cell(self, rng=random):
+        """Returns a random free cell. The cell stays free until an agent occupies it
+
+        Args:
+            rng (random.Random, optional): Random numbers generator. Defaults to the random module.
+
+        Returns:
+            pos_X (Integer), pos_Y (Integer): Position of the free cell
+        """
+        if not self.free:
+            logging.error(
+                f"There are no free cells between {self.low} and {self.high} on the x axis and {self.low} and {self.high_Y} on the y axis")
+            sys.exit()
+
+        return self.free[rng.randrange(len(self.free))]
@@ -14,8 +14,13 @@ import logging
 import time
 import datetime
 import utils
-from tqdm import tqdm
+import names
 from simulation import Simulation
+from numpy_simulation import NumpySimulation
+from random_streams import RandomStreams
+from sampling import sample_spaced_cells
+from recorder import TimeSeriesRecorder
+from mesa_model import SimulationModel
 import mesa_model_viz
 
 for handler in logging.root.handlers[:]:
@@ -31,7 +36,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_simulation(random_simulation, graphics_simulation, static_beginning, daily_data, multi_simulation_nbr):
+def run_simulation(random_simulation, graphics_simulation, static_beginning, daily_data, multi_simulation_nbr, numpy_engine=False, rng=None):
     """Runs the simulation
 
     Args:
@@ -40,18 +45,25 @@ def run_simulation(random_simulation, graphics_simulation, static_beginning, dai
         static_beginning (Boolean): If Simulation starts with defined values
         daily_data (Boolean): Stores chart data and shows plots at the end
         multi_simulation_nbr (Integer, optional): Number os simulations to run in one script exacution. Defaults to 0.
+        numpy_engine (Boolean, optional): If the simulation uses the NumPy engine, storing the agents as arrays. Defaults to False.
+        rng (RandomStreams, optional): Random numbers generator of the simulation. Defaults to None, a new one with constants.SEED.
     """
 
     # Creating simulation instance
-    new_simulation = Simulation("Test Simulation")
+    if numpy_engine:
+        new_simulation = NumpySimulation("Test Simulation", rng=rng)
+    else:
+        # in debug mode the population counters are checked against a full scan of the agents
+        new_simulation = Simulation("Test Simulation", constants.SIZE,
+                                    check_counters=constants.LOG_LEVEL == "DEBUG", rng=rng)
 
     # clearing file with real time chat data
     open(constants.CHART_DATA, 'w').close()
 
     if random_simulation:
-        # Generating random positions to use as starting values
-        random_tuple_list = utils.generate_random_tuple_list(
-        ) if constants.SOCIAL_DISTANCE == 0 else None
+        # Generating the starting positions at once, keeping the social distance between the agents
+        pos_X, pos_Y = sample_spaced_cells(constants.TOTAL_NUMBER_OF_AGENTS, constants.SOCIAL_DISTANCE, 0 + constants.RANDOM_LIMIT,
+                                           constants.SIZE - constants.RANDOM_LIMIT, new_simulation.random.generator)
 
         if static_beginning:
             healty_agents = constants.TOTAL_NUMBER_OF_AGENTS - \
@@ -65,22 +77,18 @@ def run_simulation(random_simulation, graphics_simulation, static_beginning, dai
 
             hs_data, imr_data, mask_data = utils.static_simulation(constants.TOTAL_NUMBER_OF_AGENTS, constants.SICK_PRCNTG, constants.ASYMP_PRCNTG, constants.IMMMUNE_IMR_PRCNTG,
                                                                    constants.ASYMP_IMR_PRCNTG, constants.MOD_IMR_PRCNTG, constants.SEVERE_IMR_PRCNTG, constants.DEAD_IMR_PRCNTG,
-                                                                   constants.AGENTS_WEARING_MASK_PRCNTG)
+                                                                   constants.AGENTS_WEARING_MASK_PRCNTG, new_simulation.random.generator)
             if len(hs_data) != constants.TOTAL_NUMBER_OF_AGENTS or len(imr_data) != constants.TOTAL_NUMBER_OF_AGENTS:
                 logger.error(
                     f"The number of HEALTH STATUS ({len(hs_data)}) and IMR ({len(imr_data)}) data must be equal to the Total of AGENTS in the simulation ({constants.TOTAL_NUMBER_OF_AGENTS})")
                 sys.exit()
         # Creating agents
-        pbar = tqdm(range(constants.TOTAL_NUMBER_OF_AGENTS))
-        for _ in pbar:
-            if not static_beginning:  # no static values in the begginging
-                utils.create_simulation_agents(
-                    new_simulation, random_tuple_list)
-            else:
-                # static values in the begginging
-                utils.create_simulation_agents(
-                    new_simulation, random_tuple_list, hs_data=hs_data, imr_data=imr_data, mask_data=mask_data)
-        pbar.set_description("Creating Agents in random positions")
+        if not static_beginning:  # no static values in the begginging
+            new_simulation.create_agents(pos_X, pos_Y)
+        else:
+            # static values in the begginging
+            new_simulation.create_agents(
+                pos_X, pos_Y, health_status=hs_data, immune_system_response=imr_data, wear_mask=mask_data)
     else:
         logger.error(
             f"Not implemented yet. The Agents can only move in a random way")
@@ -98,25 +106,17 @@ def run_simulation(random_simulation, graphics_simulation, static_beginning, dai
     logger.info(
         f"People wearing a mask: {new_simulation.get_wearing_mask_count()}")
 
-    # initializing the variables to build final chart
-    x = [1]
-    y_healthy = [initial_healthy]
-    y_infected = [initial_infected]
-    y_dead = [initial_dead]
-    y_healed = [initial_healed]
-    y_quarantine = [initial_quarantine]
+    # series to build final chart, one column for each day of the simulation
+    recorder = TimeSeriesRecorder(utils.DETAILED_DATA_SERIES, constants.EPISODES)
+    # the daily values of the first day are the initial ones
+    recorder.record(1, initial_infected, initial_dead, initial_healed, initial_quarantine,
+                    initial_healthy, initial_infected, initial_dead, initial_healed, initial_quarantine)
 
     # updating file qith initial values, for live chart
     line = f"{1}, {initial_healthy}, {initial_infected}, {initial_dead}, {initial_healed}, {initial_quarantine}\n"
     with open(constants.CHART_DATA, 'a') as f:
         f.write(line)
 
-    if daily_data:
-        daily_infected = [initial_infected]
-        daily_healed = [initial_healed]
-        daily_dead = [initial_dead]
-        daily_quarantine = [initial_quarantine]
-
     # Running simulation
     for i in range(2, constants.EPISODES + 1):
         # moving agents
@@ -147,23 +147,11 @@ def run_simulation(random_simulation, graphics_simulation, static_beginning, dai
         quarantine = new_simulation.get_quarantine_count()
 
         # saving data for final chart
-        x.append(i)
-        y_healthy.append(new_simulation.get_healthy_count())
-        y_infected.append(infected)
-        y_dead.append(dead)
-        y_healed.append(healed)
-        y_quarantine.append(quarantine)
-
-        if daily_data:
-            # saving daily
-            new_daily_infected, new_daily_healed, new_daily_dead, new_daily_quarantine = new_simulation.get_daily_data()
-
-            daily_healed.append(new_daily_healed)
-            daily_dead.append(new_daily_dead)
-            daily_quarantine.append(new_daily_quarantine)
-            daily_infected.append(new_daily_infected)
-            # resetting values to 0 in each day
-            new_simulation.reset_daily_data()
+        new_daily_infected, new_daily_healed, new_daily_dead, new_daily_quarantine = new_simulation.get_daily_data()
+        recorder.record(i, new_daily_infected, new_daily_dead, new_daily_healed, new_daily_quarantine,
+                        healthy, infected, dead, healed, quarantine)
+        # resetting values to 0 in each day, so the daily series hold the values of the day
+        new_simulation.reset_daily_data()
 
         # updating file for live chart
         line = f"{i}, {healthy}, {infected}, {dead}, {healed}, {quarantine}\n"
@@ -180,13 +168,43 @@ def run_simulation(random_simulation, graphics_simulation, static_beginning, dai
         else:
             can_plot = True
 
-        utils.show_detailed_data(x, daily_infected, daily_dead, daily_healed,
-                                 daily_quarantine, y_healthy, y_infected, y_dead, y_healed, y_quarantine, can_plot)
-        utils.save_detailed_data(x, daily_infected, daily_dead, daily_healed,
-                                 daily_quarantine, y_healthy, y_infected, y_dead, y_healed, y_quarantine, static_beginning)
+        # the recorded series are given without copies
+        utils.show_detailed_data(*recorder.views(), can_plot)
+        utils.save_detailed_data(*recorder.views(), static_beginning)
 
 
-def main(random_simulation, graphics_simulation, static_beginning, daily_data, load_average_simulations, max_files_nbr, multi_simulation_nbr, load_file):
+def run_mesa_batch(static_beginning, steps, seed):
+    """Runs the Mesa model without the visualization server, as fast as possible, and saves the collected series
+
+    Args:
+        static_beginning (Boolean): If the model starts with the config.yaml file's static values
+        steps (Integer): Maximum number of steps, the run stops before if the model is no longer running
+        seed (Integer): Seed of the random numbers, None for a random seed
+    """
+    model = SimulationModel(constants.TOTAL_NUMBER_OF_AGENTS, constants.SIZE, constants.SIZE,
+                            sick_p=constants.SICK_PRCNTG, aymp_p=constants.ASYMP_PRCNTG,
+                            imr_immune_p=constants.IMMMUNE_IMR_PRCNTG, imr_asymp_p=constants.ASYMP_IMR_PRCNTG,
+                            imr_mod_p=constants.MOD_IMR_PRCNTG, imr_severe_p=constants.SEVERE_IMR_PRCNTG,
+                            imr_dead_p=constants.DEAD_IMR_PRCNTG, wearing_mask=constants.AGENTS_WEARING_MASK_PRCNTG,
+                            travelling_agents=constants.TRAVELLING_NUMBER_OF_AGENTS,
+                            vaccination_prcntg=constants.VACCINATED_PRCNT_OF_AGENTS,
+                            static=static_beginning, seed=seed)
+
+    start = time.time()
+    while model.running and model.schedule.steps < steps:
+        model.step()
+    execution = time.time() - start
+    logger.info(
+        f"Mesa simulation took: {datetime.timedelta(seconds=execution)} for {model.schedule.steps} steps")
+
+    # one recorded row for each step
+    days = list(range(1, len(model.datacollector_dailys) + 1))
+    filename = utils.save_mesa_data(days, model.datacollector_currents_prcntg.to_dict(), model.datacollector_dailys.to_dict(),
+                                    model.datacollector_cumulatives_prcntg.to_dict(), static_beginning, seed)
+    logger.info(f"Mesa simulation data saved in {filename}")
+
+
+def main(random_simulation, graphics_simulation, static_beginning, daily_data, load_average_simulations, max_files_nbr, multi_simulation_nbr, load_file, numpy_engine=False):
     """Runs the simulation n times
 
     Args:
@@ -197,6 +215,7 @@ def main(random_simulation, graphics_simulation, static_beginning, daily_data, l
         average_simulations (Boolean): Uses saved simulations by averaging its values
         max_files_nbr (Integer): Number of files to use in mean calculus when average_simulations is True
         multi_simulation_nbr (Integer, optional): Number os simulations to run in one script exacution.
+        numpy_engine (Boolean, optional): If the simulation uses the NumPy engine. Defaults to False.
     """
     if load_average_simulations:
         if multi_simulation_nbr and multi_simulation_nbr > 1:
@@ -212,13 +231,18 @@ def main(random_simulation, graphics_simulation, static_beginning, daily_data, l
         if not multi_simulation_nbr:
             multi_simulation_nbr = 1
 
+        # independent random numbers for each simulation, all reproduced by the same seed
+        if constants.SEED is not None:
+            names.seed(constants.SEED)
+        streams = RandomStreams(constants.SEED).spawn(multi_simulation_nbr)
+
         time_array = []
         for i in range(multi_simulation_nbr):
             logger.info(
                 f"Running Simulation number {i + 1}/{multi_simulation_nbr}")
             start = time.time()
             run_simulation(random_simulation, graphics_simulation, static_beginning,
-                           daily_data, multi_simulation_nbr)
+                           daily_data, multi_simulation_nbr, numpy_engine, streams[i])
             end = time.time()
             execution = end - start
             time_array.append(execution)
@@ -237,6 +261,8 @@ if __name__ == "__main__":
     #                     help="runs with agents initialized at random positions and moving randomly")
     parser.add_argument("-o", "--old", action="store_true",
                         help="uses version 1")
+    parser.add_argument("-n", "--numpy", action="store_true",
+                        help="uses the NumPy engine for version 1, storing the agents as arrays")
     # parser.add_argument("-m", "--mesa", action="store_true",
     #                     help="uses mesa library to build and visualize the simulation")
     parser.add_argument("-g", "--graphics", action="store_true",
@@ -253,6 +279,12 @@ if __name__ == "__main__":
                         help="number of simulations to run in one execution.")
     parser.add_argument("-lf", "--load_file", type=str,
                         help="File path to visualize data.")
+    parser.add_argument("-b", "--batch", action="store_true",
+                        help="runs version 2 (mesa) without the visualization server and saves the collected data")
+    parser.add_argument("-steps", "--steps", type=int, default=constants.EPISODES,
+                        help="maximum number of steps of a --batch run. Defaults to the config.yaml file's EPISODES")
+    parser.add_argument("-seed", "--seed", type=int, default=constants.SEED,
+                        help="seed of the random numbers of a --batch run. Defaults to the config.yaml file's SEED")
 
     args = parser.parse_args()
 
@@ -265,17 +297,32 @@ if __name__ == "__main__":
         parser.error(
             "--multi_simulation_nbr and --daily_data must be used at same time")
 
+    if args.numpy and not args.old:
+        parser.error("--numpy requires --old")
+
     if args.load_file:
         if args.daily_data or args.load_average_simulations or args.max_files_nbr or args.graphics or args.multi_simulation_nbr:
             parser.error(
                 "--load_file is a stand alone argument.")
 
+    if args.batch:
+        if args.old:
+            parser.error("--batch and --old cannot be used at same time")
+        if args.daily_data or args.load_average_simulations or args.max_files_nbr or args.graphics or args.multi_simulation_nbr or args.load_file:
+            parser.error(
+                "--batch can only be used with --static_beginning, --steps and --seed")
+        if args.steps < 1:
+            parser.error("--steps must be greater than 0")
+
     logger.info(f"{constants.APP_NAME} {__version__}")
 
     if args.old:
         main(random_simulation=True, graphics_simulation=args.graphics,
              static_beginning=args.static_beginning, daily_data=args.daily_data,
              load_average_simulations=args.load_average_simulations, max_files_nbr=args.max_files_nbr,
-             multi_simulation_nbr=args.multi_simulation_nbr, load_file=args.load_file)
+             multi_simulation_nbr=args.multi_simulation_nbr, load_file=args.load_file, numpy_engine=args.numpy)
+    elif args.batch:
+        run_mesa_batch(static_beginning=args.static_beginning,
+                       steps=args.steps, seed=args.seed)
     else:
         mesa_model_viz.run_simulation()
@@ -1,10 +1,9 @@
 import logging
 from mesa import Agent
 import constants
-import uuid
+import disease
 import random
-from faker import Faker
-fake = Faker()
+import names
 logging.basicConfig(
     level=constants.LOG_LEVEL,
     filename='logs/mesa_model.log',
@@ -22,28 +21,27 @@ days_list.append(False)
 class SimulationAgent(Agent):
     """Class representing a human being (Agent).
     """
+    # the attributes of the mesa Agent class (unique_id, model and pos) are still kept in the instance dictionary
+    __slots__ = ("_name", "age", "health_status", "previous_health_status", "immune_system_response",
+                 "infection_day", "recovered", "wear_mask", "quarantine", "vaccinated", "vaccinated_day")
 
     def __init__(self, model,  name=None, age=None, health_status=None, immune_system_response=None, wear_mask=None) -> None:
         """Class constructor.
 
         Args:
             model (mesa.Model): The simulation's model.
-            name (str, optional): Agent's name. Defaults to None.
+            name (str, optional): Agent's name. Defaults to None, the name comes from the names pool on the first access.
             age (Integer, optional): Agent's age. Defaults to None.
             health_status (inIntegert, optional): Agent's health status. Defaults to None.
             immune_system_response (Integer, optional): Agent's Immune System response type. Defaults to None.
             wear_mask (Boolean, optional): If agent wears a mask. Defaults to None.
         """
-        id_ = uuid.uuid1()
-        super().__init__(id_, model)
+        super().__init__(model.next_id(), model)
         if age is None:
-            age = random.randint(0, 100)
-
-        if name is None:
-            name = fake.name()
+            age = self.random.randint(0, 100)
 
         if health_status is None:
-            health_status = random.choice([constants.SICK,
+            health_status = self.random.choice([constants.SICK,
                                            constants.ASYMPTOMATIC,
                                            constants.WITH_DISEASES_SEQUELAES,
                                            constants.TOTAL_RECOVERY,
@@ -52,22 +50,33 @@ class SimulationAgent(Agent):
 
         if immune_system_response is None:
             immune_system_response = SimulationAgent.immune_response_by_age(
-                age, health_status)
+                age, health_status, self.random)
 
         if wear_mask is None:
-            wear_mask = bool(random.getrandbits(1))
+            wear_mask = self.random.random() < 0.5
 
-        self.name = name
+        self._name = name
         self.age = age
         self.health_status = health_status
         self.previous_health_status = None
         self.immune_system_response = immune_system_response
-        self.infected_days = None
+        # day 0 of the infection, the model calendar schedules the disease milestones from it
+        self.infection_day = None
         self.recovered = False
         self.wear_mask = wear_mask
         self.quarantine = False
-        self.vaccinated = random.choice(days_list) if self.immune_system_response != constants.IMR_IMMUNE \
+        # days since the first vaccine dose in the vaccinated_day, the agent has no vaccine when it is 0 or False
+        self.vaccinated = False
+        self.vaccinated_day = None
+        vaccinated = self.random.choice(days_list) if self.immune_system_response != constants.IMR_IMMUNE \
             and self.health_status == constants.HEALTHY else True
+        if vaccinated:
+            model.start_vaccination(self, vaccinated)
+        else:
+            self.vaccinated = vaccinated
+        # the agents created with the virus get their day 0 in the next day
+        if self.health_status == constants.SICK or self.health_status == constants.ASYMPTOMATIC:
+            model.start_infection(self, model.day + 1)
 
     def move(self) -> None:
         """This methods allows the agent to move into a new grid cell.
@@ -90,7 +99,6 @@ class SimulationAgent(Agent):
 
         new_position = None
         tries = 0  # number of times the agent tries to keep the social distance until quit
-        random.shuffle(possible_new_pos)
 
         # start while
         # checking if agent can move to a cell in the neighborhood based on the social distance value for each cell
@@ -98,26 +106,24 @@ class SimulationAgent(Agent):
             tries += 1
             logger.debug(
                 f'Agent {self.unique_id} try number {tries}!')
-            for pos in possible_new_pos:
+            # cells with no agents in the social distance window but the current agent, looked up in the grid's window counts
+            distant_pos = [pos for pos in possible_new_pos if self.model.grid.is_distant(pos)]
+            if distant_pos:
                 cells_in_neighborhood = self.model.grid.get_neighborhood(
-                    pos,
+                    self.random.choice(distant_pos),
                     # If True, may move in all 8 directions.Otherwise, only up, down, left, right.
                     moore=True,
                     include_center=False,
                     radius=constants.SOCIAL_DISTANCE_STEP)
                 logger.debug(
                     f'Agent {self.unique_id} cells_in_neighborhood: {cells_in_neighborhood}!')
-
-                # if no cell with agents in the neighborhood (empty cell), the current agents cell is not empty for all neighborhood checks
-                if [self.model.grid.is_cell_empty(cell) for cell in cells_in_neighborhood].count(False) == 1:
-                    new_position = self.random.choice(cells_in_neighborhood)
+                new_position = self.random.choice(cells_in_neighborhood)
 
             # trying another cell
             if new_position is None:
                 possible_new_pos = self.model.grid.get_neighborhood(
                     # getting random empty cell
-                    self.random.choice(
-                        sorted(self.model.grid.empties, reverse=True)),
+                    self.model.grid.random_empty_cell(self.random),
                     moore=True,
                     include_center=False)
                 logger.debug(
@@ -130,10 +136,9 @@ class SimulationAgent(Agent):
                 f'Agent {self.unique_id} got a new cell keeping the social distance: {new_position}')
             self.model.grid.move_agent(self, new_position)
         else:  # the agent can stay or move to a random empty cell, like i quit this sh!t!
-            value = random.random()
+            value = self.random.random()
             if value <= 0.5:
-                new_position = self.random.choice(
-                    sorted(self.model.grid.empties))
+                new_position = self.model.grid.random_empty_cell(self.random)
 
                 self.model.grid.move_agent(self, new_position)
                 logger.debug(
@@ -161,52 +166,99 @@ class SimulationAgent(Agent):
             for mate in tmp_cellmates:
                 cellmates.append(mate)
 
+        if constants.COMBINED_HAZARD:
+            self.combined_contacts(cellmates)
+            return
+
         # if there is agents in contact
         if len(cellmates) > 1:
             for agent in cellmates:
                 # excluding the day 0, when the agents get the infection, where we change from None to 0
                 if agent != self and agent.infected_days and not self.recovered and self.immune_system_response != constants.IMR_IMMUNE:
                     # can get the virus, neverthless he got it once before, the recovered instance variable can change
-                    if self.health_status > constants.ASYMPTOMATIC:
+                    # the agents that died today stay in the grid until the next step
+                    if self.health_status > constants.ASYMPTOMATIC and self.health_status != constants.DEAD:
                         hs_new_value_for_current_agent = SimulationAgent.value_based_probability(
-                            agent.health_status, self.immune_system_response, agent.wear_mask, self.wear_mask)
+                            agent.health_status, self.immune_system_response, agent.wear_mask, self.wear_mask, self.random)
                         if hs_new_value_for_current_agent != -1:
                             self.health_status = hs_new_value_for_current_agent
                             logger.debug(
                                 f"Agent {self.unique_id} had an update in his health status: {constants.HEALTH_STATUS_DICT[self.health_status]}")
+                            if self.health_status <= constants.ASYMPTOMATIC:
+                                self.model.start_infection(self)
+
+    def combined_contacts(self, cellmates) -> None:
+        """Updates the status of the agent with a single random draw, from the combined probabilities of all its infectious cellmates.
+        See disease.combined_transmission_outcome.
+
+        Args:
+            cellmates (List): Agents in the contagious radius.
+        """
+        # can get the virus, neverthless he got it once before, the recovered instance variable can change
+        # the agents that died today stay in the grid until the next step
+        if self.recovered or self.immune_system_response == constants.IMR_IMMUNE \
+                or self.health_status <= constants.ASYMPTOMATIC or self.health_status == constants.DEAD:
+            return
+
+        # excluding the day 0, when the agents get the infection, where we change from None to 0
+        contacts = [(agent.health_status, agent.wear_mask) for agent in cellmates
+                    if agent != self and agent.infected_days and agent.health_status <= constants.ASYMPTOMATIC]
+        if not contacts:
+            return
+
+        hs_new_value_for_current_agent = disease.combined_transmission_outcome(
+            contacts, self.immune_system_response, self.wear_mask, self.random.random(), first_outcome=False)
+        if hs_new_value_for_current_agent != -1:
+            self.health_status = hs_new_value_for_current_agent
+            logger.debug(
+                f"Agent {self.unique_id} had an update in his health status: {constants.HEALTH_STATUS_DICT[self.health_status]}")
+            if self.health_status <= constants.ASYMPTOMATIC:
+                self.model.start_infection(self)
 
     def step(self) -> None:
         """Executes the agent actions in each sumulation step.
 
         First it moves the agent, then evaluates the other agents in contact with it. 
-        Finally, the "clinic" situation of the agent is updated, based on the number days with the virus and the agents parameters.
+        The "clinic" situation of the agent is updated by the model calendar, in the days of its disease and vaccine milestones.
         """
         if constants.SOCIAL_DISTANCE_STEP == 0:
             self.move()
         else:
             self.move_social_distance()
 
-        self.agents_in_contact()
-        self.update_infected_agents_env()
-        self.update_vaccinated_agents_env()
+        # in push mode, and with the pressure map, the contacts are evaluated by the model
+        if not constants.PUSH_CONTACTS and not constants.PRESSURE_MAP:
+            self.agents_in_contact()
 
-    def get_health_status(self) -> int:
-        """Return the agent's healt_status.
+    @property
+    def name(self) -> str:
+        """Agent's name, taken from the names pool on the first access if the agent was created with no name.
 
         Returns:
-            (Integer): Agent's healt_status.
+            (String): Agent's name.
         """
-        return self.health_status
+        if self._name is None:
+            self._name = names.agent_name(self.unique_id)
+        return self._name
+
+    @property
+    def infected_days(self) -> int:
+        """Agent's number of days with the virus, counted from its day 0.
 
-    def update_infected_agents_env(self) -> None:
-        """Updates the agents health status based on the number of days with the virus.
+        Returns:
+            (Integer): Number of days with the virus, None if the agent never got the virus.
         """
-        SimulationAgent.update_infected_agents(self)
+        if self.infection_day is None:
+            return None
+        return max(0, self.model.day - self.infection_day)
 
-    def update_vaccinated_agents_env(self) -> None:
-        """Updates the vaccination status
+    def get_health_status(self) -> int:
+        """Return the agent's healt_status.
+
+        Returns:
+            (Integer): Agent's healt_status.
         """
-        SimulationAgent.update_vaccinated_agents(self)
+        return self.health_status
 
     def __str__(self) -> str:
         """Overrides how the agent is printed.
@@ -225,6 +277,14 @@ class SimulationAgent(Agent):
         """
         return self.unique_id == other.unique_id
 
+    def __hash__(self) -> int:
+        """Overrides the agent's hash, so it is based on its ID.
+
+        Returns:
+            (Integer): Agent's hash.
+        """
+        return self.unique_id
+
     def __ne__(self, other) -> bool:
         """Overrides how the `!=` operator is used in the SimulationAgent class.
 
@@ -235,9 +295,16 @@ class SimulationAgent(Agent):
 
     @staticmethod
     def update_vaccinated_agents(agent) -> None:
-        if agent.vaccinated and agent.immune_system_response != constants.IMR_IMMUNE:
+        """Updates the immune system response of a vaccinated agent, in the days of its vaccine milestones.
+        The days since the first vaccine dose are not counted while the agent is IMMUNE.
+
+        Args:
+            agent (SimulationAgent): A SimulationAgent.
+        """
+        vaccinated_days = agent.vaccinated + agent.model.day - agent.vaccinated_day
+        if agent.immune_system_response != constants.IMR_IMMUNE:
             # first dose
-            if agent.vaccinated > constants.FIRST_DOSE_IMMUNE_TIME  \
+            if vaccinated_days > constants.FIRST_DOSE_IMMUNE_TIME  \
                     and agent.immune_system_response != constants.IMR_ASYMPTOMATIC:
 
                 prob = agent.model.random.random()
@@ -250,7 +317,7 @@ class SimulationAgent(Agent):
                         logger.debug(
                             f'Agent {agent.unique_id} is now {constants.IMR_DICT[agent.immune_system_response]} after the first vaccine dose!')
             # second dose
-            if agent.vaccinated > constants.SECOND_DOSE_IMMUNE_TIME and agent.vaccinated < constants.SECOND_DOSE_IMMUNE_TIME + 5 \
+            if vaccinated_days > constants.SECOND_DOSE_IMMUNE_TIME and vaccinated_days < constants.SECOND_DOSE_IMMUNE_TIME + 5 \
                     and agent.immune_system_response != constants.IMR_IMMUNE:  # 5 days of interval to get immune
 
                 prob = agent.model.random.random()
@@ -259,29 +326,50 @@ class SimulationAgent(Agent):
                     logger.info(
                         f'Agent {agent.unique_id} is now IMR_IMMUNE after the second vaccine dose!')
 
-            agent.vaccinated += 1
+            agent.vaccinated = vaccinated_days + 1
+            agent.vaccinated_day = agent.model.day + 1
 
     @staticmethod
-    def update_infected_agents(agent) -> None:
-        """Updates the agents health status based on the number of days with the virus.
+    def next_vaccine_day(agent, day) -> int:
+        """Returns the next day after the given one when the vaccine can update the agent's immune system response.
 
-        This method can be called through the SimulationAgent class so we can update the agents in the quarantine room that are not in the simulation model grid.
+        The first dose is tried every day after FIRST_DOSE_IMMUNE_TIME until the agent is IMMUNE or ASYMPTOMATIC,
+        the second dose in the 4 days after SECOND_DOSE_IMMUNE_TIME until it is IMMUNE.
+
+        Args:
+            agent (SimulationAgent): A vaccinated SimulationAgent.
+            day (Integer): Day after which the milestone is searched.
+
+        Returns:
+            (Integer): Day of the next vaccine milestone, None if the vaccine cannot change the agent anymore.
+        """
+        if agent.immune_system_response == constants.IMR_IMMUNE:
+            return None
+
+        # day of the first vaccine dose, with the days counted since the last update
+        first_dose_day = agent.vaccinated_day - agent.vaccinated
+        days = []
+        if agent.immune_system_response != constants.IMR_ASYMPTOMATIC:
+            days.append(max(day + 1, first_dose_day + constants.FIRST_DOSE_IMMUNE_TIME + 1))
+        second_dose_day = max(day + 1, first_dose_day + constants.SECOND_DOSE_IMMUNE_TIME + 1)
+        if second_dose_day < first_dose_day + constants.SECOND_DOSE_IMMUNE_TIME + 5:
+            days.append(second_dose_day)
+        return min(days) if days else None
+
+    @staticmethod
+    def update_infected_agents(agent, action) -> None:
+        """Updates the agents health status in the days of its disease milestones, based on the number of days with the virus.
+
+        This method is called by the model calendar for the agents in the grid and for the agents in the quarantine room.
 
         Args:
             agent (SimulationAgent): A SimulationAgent.
+            action (Integer): Disease milestone action, from the disease progression table.
         """
-        # evaluating time passing by, for all agents
         if (agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC) and not agent.recovered:
-            # initializing value
-            if agent.infected_days is None:
-                agent.infected_days = 0
-                agent.model.daily_infected += 1
-                logger.debug(
-                    f"Agent {agent.unique_id} is now on is day 0 for infected people. He is known as {agent.name}")
-
             # infected threshould where people recover
-            elif agent.infected_days == constants.INFECTED_DAYS_THRESHOLD_FOR_INFECTED:
-                value = random.random()
+            if action == disease.RECOVER:
+                value = agent.random.random()
                 # previous here is because people change to asymptomatic
                 if agent.health_status == constants.SICK or agent.previous_health_status == constants.SICK:
                     if value < constants.RECOVERY_SEQUELS_P:
@@ -303,98 +391,51 @@ class SimulationAgent(Agent):
                     [constants.IMR_IMMUNE, constants.IMR_ASYMPTOMATIC])
 
             # case of deadly infected
-            elif agent.infected_days == constants.INFECTED_DAYS_THRESHOLD_FOR_DEAD:
+            elif action == disease.DIE:
                 if agent.immune_system_response == constants.IMR_DEADLY_INFECTED:
                     agent.health_status = constants.DEAD
                     agent.model.daily_dead += 1
                     logger.debug(
                         f"Sadly Agent {agent.unique_id} died. He was known as {agent.name}")
-                agent.infected_days += 1
 
             # infected threshould where people stop being contagious
-            elif agent.infected_days == constants.INFECTED_DAYS_THRESHOLD_FOR_NOT_CONTAGIOUS:
+            elif action == disease.NOT_CONTAGIOUS:
                 if agent.health_status != constants.ASYMPTOMATIC:
                     agent.previous_health_status = constants.SICK
                     agent.health_status = constants.ASYMPTOMATIC
                     logger.debug(
                         f"Agent {agent.unique_id} is now better and ASYMPTOMATIC. He is known as {agent.name}")
 
-                agent.infected_days += 1
-            else:
-                agent.infected_days += 1
+            SimulationAgent.update_infectious(agent)
 
     @staticmethod
-    def immune_response_by_age(age, health_status) -> int:
-        """Returns the immune system response type according to the agent's age.
+    def update_infectious(agent) -> None:
+        """Adds or removes the agent from the model's infectious agents, SICK or ASYMPTOMATIC after their day 0.
+
+        Args:
+            agent (SimulationAgent): A SimulationAgent.
+        """
+        if agent.infected_days and agent.health_status <= constants.ASYMPTOMATIC:
+            agent.model.infectious[agent.unique_id] = agent
+        else:
+            agent.model.infectious.pop(agent.unique_id, None)
+
+    @staticmethod
+    def immune_response_by_age(age, health_status, rng=random) -> int:
+        """Returns the immune system response type according to the agent's age, from the disease immune response table.
 
         Args:
             age (Integer): Agent's age.
             health_status (Integer): Agent's health status.
+            rng (RandomStreams, optional): Random numbers generator. Defaults to the random module.
 
         Returns:
             (Integer): Immune system response type.
         """
-
-        def age_probabilities(value, pdir, health_status) -> int:
-            """Returns Immune response type based on age, health status, and probability of having a deadly immune system response.
-
-            0______|P_DIR|_______1
-
-            0__|ADM_HOSP_P|____|ADM_HOSP_P + ADM_HOSP_ICU_P|___|19/20|___|1/20|__1
-
-            Args:
-                value (Float): Random value between 0 and 1.
-                pdir (Float): Probability of having a deadly immune system response based on the agent's age.
-                health_status (INteger):Agent's health status.
-
-            Returns:
-                (Integer): Immune system response type.
-            """
-            value_d = random.random()
-            if value < constants.ADM_HOSP_P:
-                if value_d < pdir:
-                    return constants.IMR_DEADLY_INFECTED
-                else:
-                    return constants.IMR_MODERATELY_INFECTED
-            elif value > constants.ADM_HOSP_P and value < constants.ADM_HOSP_P + constants.ADM_HOSP_ICU_P:
-                if value_d < pdir:
-                    return constants.IMR_DEADLY_INFECTED
-                else:
-                    return constants.IMR_SEVERE_INFECTED
-            else:  # prob of being healthy
-                if value_d < pdir:
-                    return constants.IMR_DEADLY_INFECTED
-                elif value_d > pdir:
-                    # 19.8/20 chances to be ASYMPTOMATIC over IMMUNE
-                    if value < 19.8 * ((1-pdir) / 20):
-                        return constants.IMR_ASYMPTOMATIC
-                    else:
-                        if health_status == constants.HEALTHY:  # only healthy people can be immune
-                            return constants.IMR_IMMUNE
-                        else:
-                            return constants.IMR_ASYMPTOMATIC
-        value = random.random()
-        if age <= 9:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[0], health_status)
-        elif age > 9 and age <= 19:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[1], health_status)
-        elif age > 19 and age <= 29:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[2], health_status)
-        elif age > 29 and age <= 39:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[3], health_status)
-        elif age > 39 and age <= 49:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[4], health_status)
-        elif age > 49 and age <= 59:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[5], health_status)
-        elif age > 59 and age <= 69:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[6], health_status)
-        elif age > 69 and age <= 79:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[7], health_status)
-        elif age > 79:
-            return age_probabilities(value, constants.AGE_P_DIR_ARRAY[8], health_status)
+        return disease.immune_response(age, health_status, rng.random())
 
     @ staticmethod
-    def value_based_probability(health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent) -> int:
+    def value_based_probability(health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent, rng=random) -> int:
         """Returns the agent new health status based on its immune system type and on the health status of the agent in contact with.
 
         SICK_P| HEALTHY | ASSYMPTOMATIC_P|
@@ -406,6 +447,7 @@ class SimulationAgent(Agent):
             agent_immune_response (Integer): Current agent imune response type.
             wear_mask_agent_in_contact (Boolean): If agent in contact wears a mask.
             wear_mask_current_agent (Boolean): If current agent wears a mask.
+            rng (RandomStreams, optional): Random numbers generator. Defaults to the random module.
 
         Returns:
             Health Status (Integer): Agent new health status.
@@ -413,37 +455,6 @@ class SimulationAgent(Agent):
 
         if health_status > constants.ASYMPTOMATIC or agent_immune_response == constants.IMR_IMMUNE:
             return -1  # do not change the agent's healthy status
-        else:
-            random_value = random.random()
-            # using mask reduces the spread
-            if wear_mask_agent_in_contact:
-                mask_value = constants.CONTAGIOUS_AGENT_MASK
-            elif wear_mask_agent_in_contact and wear_mask_current_agent:
-                mask_value = constants.HEALTHY_AGENT_MASK
-            elif wear_mask_current_agent:
-                mask_value = constants.CONTAGIOUS_AGENT_MASK_HEALTHY_MASK
-            else:
-                mask_value = constants.CONTAGIOUS_AGENT_NO_MASK_HEALTHY_NO_MASK
-
-            if random_value <= constants.SICK_P * mask_value:
-                if agent_immune_response > constants.IMR_ASYMPTOMATIC:
-                    return constants.SICK
-                elif agent_immune_response == constants.IMR_ASYMPTOMATIC:
-                    return constants.ASYMPTOMATIC
-                elif agent_immune_response == constants.IMR_IMMUNE:
-                    return -1
-
-            elif random_value >= constants.SICK_P * mask_value and \
-                    random_value <= constants.SICK_P * mask_value + constants.HEALTHY_P * mask_value:
-                return constants.HEALTHY
-
-            elif random_value >= 1 - constants.ASYMPTOMATIC_P * mask_value:
-                if agent_immune_response > constants.IMR_ASYMPTOMATIC:
-                    return constants.SICK
-                elif agent_immune_response == constants.IMR_ASYMPTOMATIC:
-                    return constants.ASYMPTOMATIC
-                elif agent_immune_response == constants.IMR_IMMUNE:
-                    return -1
-            else:
-                # when agents wear a mask, the probability count is less than 1 so we end up here, where the masks did not allow the contagious
-                return -1
+        # the mask cases and the probability thresholds are computed once in the transmission table
+        return disease.transmission_outcome(
+            health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent, rng.random())
@@ -1,14 +1,20 @@
 import math
 from mesa import Model
 from mesa.time import RandomActivation
-from mesa.space import MultiGrid  # allows multiple agents in the same cell
-from mesa.datacollection import DataCollector
+from social_distance_grid import SocialDistanceGrid  # allows multiple agents in the same cell
+from recorder import TimeSeriesRecorder
 from mesa_agent import SimulationAgent
 import constants
+import disease
 import random
 import logging
 import sys
 import utils
+import names
+from random_streams import RandomStreams
+from timer_wheel import TimerWheel
+from pressure_map import PressureMap
+import numpy as np
 
 logging.basicConfig(
     level=constants.LOG_LEVEL,
@@ -39,7 +45,8 @@ class SimulationModel(Model):
             wearing_mask=0.2,
             travelling_agents=10,
             vaccination_prcntg=0.1,
-            static=False
+            static=False,
+            seed=None
     ) -> None:
         """Simulation constructor.
 
@@ -58,13 +65,28 @@ class SimulationModel(Model):
             travelling_agents (Integer, optional): Max number of agents Travelling in each day. Defaults to 10.
             vaccination_prcntg (float, optional): Percentage of agents being vaccinated in each day. Defaults to 0.1.
             static (bool, optional): If the simulation will have a static beginning. Defaults to False.
+            seed (Integer, optional): Seed of the random numbers, the same seed and parameters reproduce a run. Defaults to None, a random seed.
         """
+        super().__init__()
+        # the model's random numbers service, also used by the agents and the scheduler through the random attribute
+        self.random = RandomStreams(seed)
+        if seed is not None:
+            names.seed(seed)
         self.num_agents = number_agents
-        self.grid = MultiGrid(width, height, True)
+        # keeps the social distance windows and the empty cells up to date as the agents move
+        self.grid = SocialDistanceGrid(width, height, True, constants.SOCIAL_DISTANCE_STEP)
+        # infectious agents around each cell, by health status and mask, when the contacts come from the pressure map
+        self.pressure_map = PressureMap(width, height, constants.CONTAGIOUS_DISTANCE, len(disease.PRESSURE_LAYERS), torus=self.grid.torus)
         self.schedule = RandomActivation(self)
         self.running = True
+        # number of the current step, the agents' disease and vaccine milestones are scheduled by day
+        self.day = 0
+        self.disease_calendar = TimerWheel()
+        self.vaccine_calendar = TimerWheel()
 
         self.quarantine_list = []
+        # agents that can infect others (SICK or ASYMPTOMATIC after their day 0) by unique_id, updated each day
+        self.infectious = {}
         self.daily_infected = 0
         self.daily_recovered = 0
         self.daily_dead = 0
@@ -92,6 +114,10 @@ class SimulationModel(Model):
             "Dead Agents": 0,
             "Healthy Agents": 0
         }
+        # agents by health status in the grid and in quarantine, and immune agents in the grid, counted once per step for the chart reporters
+        self.health_status_counts = [0] * len(constants.HEALTH_STATUS_DICT)
+        self.quarantine_health_status_counts = [0] * len(constants.HEALTH_STATUS_DICT)
+        self.immune_count = 0
 
         if not static:
             # Create agents
@@ -105,9 +131,10 @@ class SimulationModel(Model):
         else:
             hs_data, imr_data, mask_data = self.get_static_data()
 
-            for i in range(self.num_agents):
-                agent = SimulationAgent(model=self, health_status=hs_data.pop(), immune_system_response=imr_data.pop(),
-                                        wear_mask=mask_data.pop())
+            # python values, the agents values are used as list indexes
+            for health_status, immune_system_response, wear_mask in zip(hs_data.tolist(), imr_data.tolist(), mask_data.tolist()):
+                agent = SimulationAgent(model=self, health_status=health_status, immune_system_response=immune_system_response,
+                                        wear_mask=wear_mask)
                 # adding the agent to the schedule so we can activate it using the step method
                 self.schedule.add(agent)
 
@@ -118,7 +145,7 @@ class SimulationModel(Model):
                 self.grid.place_agent(agent, (x, y))
 
         # data collect to build the chart
-        self.datacollector_currents_prcntg = DataCollector(
+        self.datacollector_currents_prcntg = TimeSeriesRecorder.from_reporters(
             {"Sick Agents": SimulationModel.current_values_sick,
              "Recovered Agents": SimulationModel.current_values_recover,
              "Dead Agents": SimulationModel.current_values_dead,
@@ -126,18 +153,20 @@ class SimulationModel(Model):
              "Quarantine Agents": SimulationModel.current_values_quarantine})
 
         # data collect to build the chart
-        self.datacollector_dailys = DataCollector(
+        self.datacollector_dailys = TimeSeriesRecorder.from_reporters(
             {"Infected Agents": SimulationModel.daily_values_sick,
              "Recovered Agents": SimulationModel.daily_values_recover,
              "Dead Agents": SimulationModel.daily_values_dead,
              "Quarantine Agents": SimulationModel.daily_values_quarantine})
 
         # data collect to build the chart
-        self.datacollector_cumulatives_prcntg = DataCollector(
+        self.datacollector_cumulatives_prcntg = TimeSeriesRecorder.from_reporters(
             {"Recovered Agents": SimulationModel.cumulative_values_recover_prcntg,
              "Dead Agents": SimulationModel.cumulative_values_dead_prcntg,
              "Healthy Agents": SimulationModel.cumulative_values_healthy_prcntg})
 
+        self.count_population()
+
     def step(self) -> None:
         """Performs the simulation's step by activating each agents step method.
 
@@ -154,20 +183,27 @@ class SimulationModel(Model):
 
         self.check_simulation_end()
 
+        self.day += 1
+        # disease and vaccine milestones due today, for the agents in the grid and in quarantine
+        self.advance_calendar()
+
+        if constants.PRESSURE_MAP:
+            self.pressure_contacts()
+        elif constants.PUSH_CONTACTS:
+            self.infectious_contacts()
+
         self.schedule.step()  # does the simulation step
 
         # Quarantine zone update
         if self.schedule.steps >= constants.QUARANTINE_DAYS:
-            self.update_quarantine_health_status()
             self.update_quarantine()
-            if self.vaccination_nbr > 0:
-                self.update_quarantine_vaccinated_agents()
 
         # vaccinate agents
         if self.vaccination_nbr > 0:
             self.vaccination()
 
-        # collecting data for chart
+        # collecting data for chart, the reporters read the counts of a single pass over the agents
+        self.count_population()
         self.datacollector_currents_prcntg.collect(self)
         self.datacollector_cumulatives_prcntg.collect(self)
         self.datacollector_dailys.collect(self)
@@ -187,10 +223,86 @@ class SimulationModel(Model):
         """Vaccinates the agents
         """
         for agent in SimulationModel.get_healthy_no_immune_agents(self)[:self.vaccination_nbr]:
-            agent.vaccinated = 1
+            self.start_vaccination(agent, 1)
             logger.info(
                 f'Agent {agent.unique_id} got his first vaccine dose! Step: {self.schedule.steps}')
-            # updates the vacination days in the agent health status update
+
+    def start_vaccination(self, agent, days) -> None:
+        """Sets the agent's vaccination day and schedules its first vaccine milestone.
+
+        Args:
+            agent (SimulationAgent): A SimulationAgent.
+            days (Integer): Days since the first vaccine dose in the next day.
+        """
+        agent.vaccinated = days
+        agent.vaccinated_day = self.day + 1
+        next_day = SimulationAgent.next_vaccine_day(agent, self.day)
+        if next_day is not None:
+            self.vaccine_calendar.schedule(next_day, agent)
+
+    def pause_vaccination(self, agent, was_immune) -> None:
+        """Stops or resumes counting the days since the first vaccine dose of an agent that became IMMUNE or stopped being IMMUNE today.
+
+        Args:
+            agent (SimulationAgent): A vaccinated SimulationAgent.
+            was_immune (Boolean): If the agent was IMMUNE before today's update.
+        """
+        if was_immune:
+            # counting again from today
+            agent.vaccinated_day = self.day
+            next_day = SimulationAgent.next_vaccine_day(agent, self.day - 1)
+            if next_day is not None:
+                self.vaccine_calendar.schedule(next_day, agent)
+        else:
+            agent.vaccinated += self.day - agent.vaccinated_day
+            agent.vaccinated_day = self.day
+
+    def start_infection(self, agent, day=None) -> None:
+        """Sets the agent's day 0 with the virus and schedules its first disease milestone.
+
+        Args:
+            agent (SimulationAgent): A SICK or ASYMPTOMATIC SimulationAgent.
+            day (Integer, optional): Day 0 of the infection. Defaults to None, the current day.
+        """
+        if agent.infection_day is not None:  # the agent already had its day 0
+            return
+        agent.infection_day = self.day if day is None else day
+        self.daily_infected += 1
+        logger.debug(
+            f"Agent {agent.unique_id} is now on is day 0 for infected people. He is known as {agent.name}")
+        self.schedule_disease_milestone(agent, 0)
+
+    def schedule_disease_milestone(self, agent, milestone) -> None:
+        """Schedules a disease milestone of the agent, from its day 0 with the virus.
+
+        Args:
+            agent (SimulationAgent): An infected SimulationAgent.
+            milestone (Integer): Position of the milestone in the disease progression milestones.
+        """
+        if milestone < len(disease.PROGRESSION_MILESTONES):
+            days, _ = disease.PROGRESSION_MILESTONES[milestone]
+            self.disease_calendar.schedule(agent.infection_day + days, agent, milestone)
+
+    def advance_calendar(self) -> None:
+        """Applies the disease and vaccine milestones due in the current day and schedules the next ones.
+        Only the agents with a milestone are visited, so the cost depends on the number of events.
+        """
+        for agent, milestone in self.disease_calendar.pop_due(self.day):
+            was_immune = agent.immune_system_response == constants.IMR_IMMUNE
+            SimulationAgent.update_infected_agents(agent, disease.PROGRESSION_MILESTONES[milestone][1])
+            # the recovery changes the immune system response
+            if agent.vaccinated and was_immune != (agent.immune_system_response == constants.IMR_IMMUNE):
+                self.pause_vaccination(agent, was_immune)
+            if (agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC) and not agent.recovered:
+                self.schedule_disease_milestone(agent, milestone + 1)
+
+        for agent, _ in self.vaccine_calendar.pop_due(self.day):
+            if agent.health_status == constants.DEAD:
+                continue
+            SimulationAgent.update_vaccinated_agents(agent)
+            next_day = SimulationAgent.next_vaccine_day(agent, self.day)
+            if next_day is not None:
+                self.vaccine_calendar.schedule(next_day, agent)
 
     def travelling(self, step) -> None:
         """Adds an removes new agents from the model, simulating the travelling behaviour.
@@ -209,7 +321,7 @@ class SimulationModel(Model):
         Args:
             step (Integer): Current step
         """
-        for i in range(random.randint(0, self.travelling_agents_nbr)): # random value with the max chosen by the user
+        for i in range(self.random.randint(0, self.travelling_agents_nbr)): # random value with the max chosen by the user
             if step > constants.NO_MORE_SICK_AGENTS_TRAVELLING_STEP:
                 health_status = self.random.choice([constants.WITH_DISEASES_SEQUELAES,
                                                     constants.TOTAL_RECOVERY,
@@ -228,6 +340,7 @@ class SimulationModel(Model):
                 agent = SimulationAgent(model=self)
 
             self.schedule.add(agent)
+            self.count_agent(agent, 1)
             # Add the agent to a random grid cell
             x = self.random.randrange(self.grid.width)
             y = self.random.randrange(self.grid.height)
@@ -239,14 +352,91 @@ class SimulationModel(Model):
     def removing_travelling_agents(self) -> None:
         """Removes agents from the model, simulating the travelling behaviour when people go to another place.
         """
-        for i in range(random.randint(0, self.travelling_agents_nbr)): # random value with the max chosen by the user
-            agent = self.schedule.agents[random.randint(
+        for i in range(self.random.randint(0, self.travelling_agents_nbr)): # random value with the max chosen by the user
+            agent = self.schedule.agents[self.random.randint(
                 0, len(self.schedule.agents)-1)]
             self.grid.remove_agent(agent)
             self.schedule.remove(agent)
+            self.count_agent(agent, -1)
+            self.infectious.pop(agent.unique_id, None)
+            self.disease_calendar.cancel(agent)
+            self.vaccine_calendar.cancel(agent)
             logger.debug(
                 f'Agent {agent.unique_id} left the city! He is {constants.HEALTH_STATUS_DICT[agent.health_status]} and he {"wears" if agent.wear_mask else "does not wear"} a mask')
 
+    def infectious_contacts(self) -> None:
+        """Updates the status of the agents in contact with the infectious agents, the push mode of SimulationAgent.agents_in_contact.
+        Only the cells around the infectious agents are visited, so the cost depends on the number of infected agents.
+        """
+        # infectious agents in contact with each agent, when they are combined in a single random draw
+        contacts = {}
+        for infectious_agent in list(self.infectious.values()):
+            # agents in quarantine are not in the grid
+            if infectious_agent.pos is None:
+                continue
+
+            cells_in_neighborhood = self.grid.get_neighborhood(
+                infectious_agent.pos,
+                moore=True,
+                include_center=True,
+                radius=constants.CONTAGIOUS_DISTANCE)
+
+            for agent in self.grid.get_cell_list_contents(cells_in_neighborhood):
+                # can get the virus, neverthless he got it once before, the recovered instance variable can change
+                if agent != infectious_agent and not agent.recovered and agent.immune_system_response != constants.IMR_IMMUNE \
+                        and agent.health_status > constants.ASYMPTOMATIC and agent.health_status != constants.DEAD:
+                    if constants.COMBINED_HAZARD:
+                        contacts.setdefault(agent, []).append((infectious_agent.health_status, infectious_agent.wear_mask))
+                        continue
+                    hs_new_value_for_current_agent = SimulationAgent.value_based_probability(
+                        infectious_agent.health_status, agent.immune_system_response, infectious_agent.wear_mask, agent.wear_mask, self.random)
+                    if hs_new_value_for_current_agent != -1:
+                        agent.health_status = hs_new_value_for_current_agent
+                        logger.debug(
+                            f"Agent {agent.unique_id} had an update in his health status: {constants.HEALTH_STATUS_DICT[agent.health_status]}")
+                        if agent.health_status <= constants.ASYMPTOMATIC:
+                            self.start_infection(agent)
+
+        # a single random draw for each agent, see disease.combined_transmission_outcome
+        for agent, agent_contacts in contacts.items():
+            hs_new_value_for_current_agent = disease.combined_transmission_outcome(
+                agent_contacts, agent.immune_system_response, agent.wear_mask, self.random.random(), first_outcome=False)
+            if hs_new_value_for_current_agent != -1:
+                agent.health_status = hs_new_value_for_current_agent
+                logger.debug(
+                    f"Agent {agent.unique_id} had an update in his health status: {constants.HEALTH_STATUS_DICT[agent.health_status]}")
+                if agent.health_status <= constants.ASYMPTOMATIC:
+                    self.start_infection(agent)
+
+    def pressure_contacts(self) -> None:
+        """Updates the status of the agents in contact with the infectious agents from the infection pressure map.
+        The infectious agents are rasterized by health status and mask and summed over the contagious radius, so each agent gets
+        its contacts from a single lookup and a single random draw. See disease.pressure_transmission_outcomes.
+        """
+        # agents in quarantine are not in the grid
+        infectious = [agent for agent in self.infectious.values() if agent.pos is not None]
+        # can get the virus, neverthless he got it once before, the recovered instance variable can change
+        susceptible = [agent for agent in self.schedule.agents
+                       if agent.pos is not None and not agent.recovered and agent.immune_system_response != constants.IMR_IMMUNE
+                       and agent.health_status > constants.ASYMPTOMATIC and agent.health_status != constants.DEAD]
+        if not infectious or not susceptible:
+            return
+
+        self.pressure_map.update([disease.pressure_layer(agent.health_status, agent.wear_mask) for agent in infectious],
+                                 [agent.pos[0] for agent in infectious], [agent.pos[1] for agent in infectious])
+        pressure = self.pressure_map.lookup([agent.pos[0] for agent in susceptible], [agent.pos[1] for agent in susceptible])
+        new_health_status = disease.pressure_transmission_outcomes(
+            pressure, np.array([agent.immune_system_response for agent in susceptible], dtype=np.intp),
+            np.array([bool(agent.wear_mask) for agent in susceptible]), self.random.generator)
+
+        for agent, hs_new_value_for_current_agent in zip(susceptible, new_health_status.tolist()):
+            if hs_new_value_for_current_agent != -1:
+                agent.health_status = hs_new_value_for_current_agent
+                logger.debug(
+                    f"Agent {agent.unique_id} had an update in his health status: {constants.HEALTH_STATUS_DICT[agent.health_status]}")
+                if agent.health_status <= constants.ASYMPTOMATIC:
+                    self.start_infection(agent)
+
     def remove_dead_agents(self) -> None:
         """Removes the dead agents from the simulation.
         """
@@ -262,18 +452,6 @@ class SimulationModel(Model):
                 # only counting here as in the step the models updates the counter with the grid agents
                 self.daily_dead += 1
 
-    def update_quarantine_vaccinated_agents(self) -> None:
-        """For each agent in quarantine updates the vaccination status.
-        """
-        for agent in self.quarantine_list:
-            SimulationAgent.update_vaccinated_agents(agent)
-
-    def update_quarantine_health_status(self) -> None:
-        """For each agent in quarantine we check is health and update is value based on the number of days with the virus.
-        """
-        for agent in self.quarantine_list:
-            SimulationAgent.update_infected_agents(agent)
-
     def update_quarantine(self) -> None:
         """Adds or removes agents from quarantine.
         """
@@ -304,28 +482,53 @@ class SimulationModel(Model):
                 logger.debug(
                     f"Agent {agent.unique_id} is now with good health. The agents is now returning to the grid at {agent.pos}")
 
+    def count_population(self) -> None:
+        """Counts, in a single pass, the agents by health status in the grid and in quarantine, and the immune agents in the grid.
+        """
+        counts = [0] * len(constants.HEALTH_STATUS_DICT)
+        immune = 0
+        for agent in self.schedule.agents:
+            counts[agent.health_status] += 1
+            if agent.immune_system_response == constants.IMR_IMMUNE:
+                immune += 1
+        quarantine_counts = [0] * len(constants.HEALTH_STATUS_DICT)
+        for agent in self.quarantine_list:
+            quarantine_counts[agent.health_status] += 1
+
+        self.health_status_counts = counts
+        self.quarantine_health_status_counts = quarantine_counts
+        self.immune_count = immune
+
+    def count_agent(self, agent, value) -> None:
+        """Updates the grid counts when an agent arrives or leaves between two counts.
+
+        Args:
+            agent (SimulationAgent): Agent arriving or leaving.
+            value (Integer): 1 when it arrives, -1 when it leaves.
+        """
+        self.health_status_counts[agent.health_status] += value
+        if agent.immune_system_response == constants.IMR_IMMUNE:
+            self.immune_count += value
+
     def check_simulation_end(self) -> None:
         """Stops the simulation when it does not have more infected agents (in both, grid and quarantine).
+        The counts are the ones of the previous step, updated with the travelling agents, as only the dead agents were removed since then.
         """
-        # if there is any agent in the list that is sickl or asymptomatic
-        if not any(agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC for agent in self.schedule.agents) and \
-                not any(agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC for agent in self.quarantine_list):
+        counts = self.health_status_counts
+        quarantine_counts = self.quarantine_health_status_counts
+        # if there is any agent that is sick or asymptomatic
+        if counts[constants.SICK] + counts[constants.ASYMPTOMATIC] + \
+                quarantine_counts[constants.SICK] + quarantine_counts[constants.ASYMPTOMATIC] == 0:
             self.running = False
 
     def get_totals_health_status(self) -> tuple:
-        """Returns the total number of infected, healthy agents in the current step.
+        """Returns the total number of infected, healthy agents in the grid, from the last count.
 
         Returns:
             [Pack/Tuple](Integer): infected, healthy.
         """
-        infected = healthy = 0
-        for agent in self.schedule.agents:
-            if agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC:
-                infected += 1
-            elif agent.health_status == constants.HEALTHY:
-                healthy += 1
-
-        return infected, healthy
+        counts = self.health_status_counts
+        return counts[constants.SICK] + counts[constants.ASYMPTOMATIC], counts[constants.HEALTHY]
 
     def get_imr_deadly(self) -> int:
         """Returns the total number of agents with immune system response of deadly infected.
@@ -339,7 +542,7 @@ class SimulationModel(Model):
         return len(deadly)
 
     def get_static_data(self) -> tuple:
-        """Returns the lists of static data to initialize the agents based on the configurations file.
+        """Returns the arrays of static data to initialize the agents based on the configurations file.
 
         Returns:
             (tuple): hs_data, imr_data, mask_data.
@@ -359,7 +562,7 @@ class SimulationModel(Model):
 
         hs_data, imr_data, mask_data = utils.static_simulation(self.num_agents, self.sick_p, self.aymp_p, self.imr_immune_p,
                                                                self.imr_asymp_p, self.imr_mod_p, self.imr_severe_p, self.imr_dead_p,
-                                                               self.wearing_mask)
+                                                               self.wearing_mask, self.random.generator)
         if len(hs_data) != self.num_agents or len(imr_data) != self.num_agents:
             logging.error(
                 f"The number of HEALTH STATUS ({len(hs_data)}) and IMR ({len(imr_data)}) data must be equal to the Total of AGENTS in the simulation ({constants.TOTAL_NUMBER_OF_AGENTS})")
@@ -399,19 +602,10 @@ class SimulationModel(Model):
         Returns:
             (Integer): Number of Agents.
         """
-        cumulative_sick = 0
-        for agent in model.schedule.agents:
-            if agent.health_status == constants.SICK:
-                cumulative_sick += 1
-            if agent.health_status == constants.ASYMPTOMATIC:
-                cumulative_sick += 1
-        for agent in model.quarantine_list:
-            if agent.health_status == constants.SICK:
-                cumulative_sick += 1
-            if agent.health_status == constants.ASYMPTOMATIC:
-                cumulative_sick += 1
-
-        return cumulative_sick
+        counts = model.health_status_counts
+        quarantine_counts = model.quarantine_health_status_counts
+        return counts[constants.SICK] + counts[constants.ASYMPTOMATIC] + \
+            quarantine_counts[constants.SICK] + quarantine_counts[constants.ASYMPTOMATIC]
 
     @ staticmethod
     def current_values_recover(model) -> int:
@@ -423,12 +617,8 @@ class SimulationModel(Model):
         Returns:
             (Integer): Number of Agents.
         """
-        cumulative_recovery = 0
-        for agent in model.schedule.agents:
-            if agent.health_status == constants.TOTAL_RECOVERY:
-                cumulative_recovery += 1
-            if agent.health_status == constants.WITH_DISEASES_SEQUELAES:
-                cumulative_recovery += 1
+        cumulative_recovery = model.health_status_counts[constants.TOTAL_RECOVERY] + \
+            model.health_status_counts[constants.WITH_DISEASES_SEQUELAES]
 
         model.totals_dict["Recovered Agents"] = cumulative_recovery
 
@@ -444,13 +634,7 @@ class SimulationModel(Model):
         Returns:
             (Integer): Number of Agents.
         """
-        cumulative_dead = 0
-        for agent in model.schedule.agents:
-            if agent.health_status == constants.DEAD:
-                cumulative_dead += 1
-        for agent in model.quarantine_list:
-            if agent.health_status == constants.DEAD:
-                cumulative_dead += 1
+        cumulative_dead = model.health_status_counts[constants.DEAD] + model.quarantine_health_status_counts[constants.DEAD]
 
         model.totals_dict["Dead Agents"] += cumulative_dead
 
@@ -466,10 +650,7 @@ class SimulationModel(Model):
         Returns:
             (Integer): Number of Agents.
         """
-        cumulative_healthy = 0
-        for agent in model.schedule.agents:
-            if agent.health_status == constants.HEALTHY:
-                cumulative_healthy += 1
+        cumulative_healthy = model.health_status_counts[constants.HEALTHY]
 
         model.totals_dict["Healthy Agents"] = cumulative_healthy
 
@@ -581,9 +762,7 @@ class SimulationModel(Model):
         Returns:
             (Integer): Number of Agents.
         """
-        IMR = [agent for agent in model.schedule.agents if agent.immune_system_response ==
-               constants.IMR_IMMUNE]
-        return len(IMR)
+        return model.immune_count
 
 
 if __name__ == "__main__":
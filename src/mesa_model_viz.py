@@ -264,7 +264,9 @@ def build_server_sim(*visualizations) -> None:
             1,
             0.1,
             description="Choose how many percentage of agents  wearing a mask in the model",
-        )
+        ),
+        # fixed parameter, the same seed and parameters reproduce a run
+        "seed": constants.SEED
     }
 
     server = ModularServer(mesa_model.SimulationModel,
@@ -0,0 +1,36 @@
+import constants
+from faker import Faker
+
+# number of names generated for the pool, the agents share them
+POOL_SIZE = 1_000
+
+fake = Faker()
+pool = []
+
+
+def seed(value):
+    """Seeds the names generation, so the same seed gives the same names
+
+    Args:
+        value (Integer): Seed
+    """
+    Faker.seed(value)
+    pool.clear()
+
+
+def agent_name(agent_id):
+    """Returns the agent's name from the pool of names. The pool is only generated on the first call, so the agents
+    do not spend time in Faker when they are created
+
+    Args:
+        agent_id (Integer): Agent's id
+
+    Returns:
+        (String): Agent's name, "anonymous" when the names are disabled in the configuration file
+    """
+    if not constants.AGENT_NAMES:
+        return "anonymous"
+
+    if not pool:
+        pool.extend(fake.name() for _ in range(POOL_SIZE))
+    return pool[agent_id % POOL_SIZE]
@@ -0,0 +1,398 @@
+import constants
+import disease
+from disease import NONE_VALUE
+from occupancy_grid import OccupancyGrid
+from contact_pairs import cell_list_pairs
+from sampling import sample_unique_cells
+from random_streams import RandomStreams
+import numpy as np
+import logging
+import sys
+
+logging.basicConfig(
+    level=constants.LOG_LEVEL,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%H:%M:%S",
+    handlers=[logging.StreamHandler()],
+)
+
+
+class NumpySimulation:
+    """Class representing the simulation with the agents stored as NumPy arrays, one array for each agent's characteristic.
+
+    It has the same methods as the Simulation class, but each one updates all the agents at once.
+    """
+    def __init__(self, name, capacity=constants.TOTAL_NUMBER_OF_AGENTS, rng=None):
+        """NumpySimulation constructor
+
+        Args:
+            name (Any): Simulation's name
+            capacity (Integer, optional): Initial size of the arrays. Defaults to constants.TOTAL_NUMBER_OF_AGENTS.
+            rng (RandomStreams, optional): Random numbers generator. Defaults to None, a new one with constants.SEED.
+        """
+        self.name = name
+        self.random = rng if rng is not None else RandomStreams(constants.SEED)
+        self.count = 0
+        self.pos_X = np.zeros(capacity, dtype=np.int32)
+        self.pos_Y = np.zeros(capacity, dtype=np.int32)
+        self.health_status = np.zeros(capacity, dtype=np.int8)
+        self.previous_health_status = np.full(capacity, NONE_VALUE, dtype=np.int8)
+        self.immune_system_response = np.zeros(capacity, dtype=np.int8)
+        self.infected_days = np.full(capacity, NONE_VALUE, dtype=np.int16)
+        self.wear_mask = np.zeros(capacity, dtype=bool)
+        self.recovered = np.zeros(capacity, dtype=bool)
+        self.quarantine = np.zeros(capacity, dtype=bool)
+        self.daily_infected = 0
+        self.daily_healed = 0
+        self.daily_dead = 0
+        self.daily_quarantine = 0
+
+    def __len__(self):
+        """Number of agents in the simulation
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return self.count
+
+    def grow(self, capacity):
+        """Resizes the arrays so they can store at least capacity agents
+
+        Args:
+            capacity (Integer): Minimum number of agents
+        """
+        old_capacity = len(self.pos_X)
+        if capacity <= old_capacity:
+            return
+        capacity = max(capacity, 2 * old_capacity)
+        for attr, fill in (("pos_X", 0), ("pos_Y", 0), ("health_status", 0), ("previous_health_status", NONE_VALUE),
+                           ("immune_system_response", 0), ("infected_days", NONE_VALUE), ("wear_mask", False),
+                           ("recovered", False), ("quarantine", False)):
+            old = getattr(self, attr)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, attr, new)
+
+    def create_agents(self, pos_X, pos_Y, health_status=None, immune_system_response=None, wear_mask=None):
+        """Creates new agents for the NumpySimulation instance. The missing values are drawn the same way as in the Simulation.create_agents method and the Agent class
+
+        Args:
+            pos_X (Array): X axis position of each agent
+            pos_Y (Array): Y axis position of each agent
+            health_status (Array, optional): Health status of each agent. Defaults to None.
+            immune_system_response (Array, optional): Immune response system type of each agent. Defaults to None.
+            wear_mask (Array, optional): If each agent wears a mask. Defaults to None.
+        """
+        total = len(pos_X)
+        if health_status is None:
+            health_status = self.random.generator.choice(
+                constants.HEALTH_ARRAY, p=constants.HEALTH_ARRAY_P, size=total)
+        else:
+            health_status = np.asarray(health_status)
+
+        if immune_system_response is None:
+            ages = self.random.integers(0, 101, size=total)
+            immune_system_response = disease.immune_responses(ages, health_status, self.random.generator)
+
+        if wear_mask is None:
+            wear_mask = self.random.integers(0, 2, size=total).astype(bool)
+
+        self.grow(self.count + total)
+        new_agents = slice(self.count, self.count + total)
+        self.pos_X[new_agents] = pos_X
+        self.pos_Y[new_agents] = pos_Y
+        self.health_status[new_agents] = health_status
+        self.immune_system_response[new_agents] = immune_system_response
+        self.wear_mask[new_agents] = wear_mask
+        self.count += total
+
+    def in_quarantine(self):
+        """Boolean mask of the agents in the quarantine zone
+
+        Returns:
+            (Array): True for the agents in quarantine
+        """
+        n = self.count
+        return (self.pos_X[:n] == constants.QUARANTINE_X) & (self.pos_Y[:n] == constants.QUARANTINE_Y)
+
+    def infected(self):
+        """Boolean mask of the SICK and ASYMPTOMATIC agents
+
+        Returns:
+            (Array): True for the infected agents
+        """
+        hs = self.health_status[:self.count]
+        return (hs == constants.SICK) | (hs == constants.ASYMPTOMATIC)
+
+    def random_step(self, random_limit, size,  p_of_agent_moving=1):
+        """Simulating the environment step. The agents move one at a time as each move depends on the positions of the agents that moved before
+
+        Args:
+            random_limit (Integer): Maximum number of units on each axis that each agent can move
+            size (Integer): Environment size
+            p_of_agent_moving (Float, optional): Percentage of agents that move in the step. Defaults to 1.
+        """
+        n = self.count
+        total = round(n * p_of_agent_moving)
+        moving = self.random.generator.choice(n, total, replace=False)
+        self.move_dead_agents(moving)
+
+        occupancy = OccupancyGrid(constants.SOCIAL_DISTANCE_STEP)
+        for (pos_X, pos_Y) in zip(self.pos_X[:n].tolist(), self.pos_Y[:n].tolist()):
+            occupancy.add(pos_X, pos_Y)
+
+        indexes = moving[self.can_move(moving)]
+        # all the random displacements are drawn at once, the agent stays where it is if none of its tries is valid
+        steps_X = self.random.integers(-random_limit, random_limit + 1,
+                                    (len(indexes), constants.RANDOM_STEP_TRIES)).tolist()
+        steps_Y = self.random.integers(-random_limit, random_limit + 1,
+                                    (len(indexes), constants.RANDOM_STEP_TRIES)).tolist()
+        for index, agent_steps_X, agent_steps_Y in zip(indexes.tolist(), steps_X, steps_Y):
+            pos_X = int(self.pos_X[index])
+            pos_Y = int(self.pos_Y[index])
+            for step_X, step_Y in zip(agent_steps_X, agent_steps_Y):
+                new_pos_X = pos_X + step_X
+                new_pos_Y = pos_Y + step_Y
+                if 0 <= new_pos_X < size and 0 <= new_pos_Y < size and \
+                        occupancy.is_free(new_pos_X, new_pos_Y, pos_X, pos_Y):
+                    occupancy.move(pos_X, pos_Y, new_pos_X, new_pos_Y)
+                    self.pos_X[index] = new_pos_X
+                    self.pos_Y[index] = new_pos_Y
+                    break
+
+    def random_step_no_social_distance(self, size,  p_of_agent_moving=1):
+        """Simulating the environment step with no care about social distance
+
+        Args:
+            size (Integer): Environment size
+            p_of_agent_moving (Float, optional): Percentage of agents that move in the step. Defaults to 1.
+        """
+        n = self.count
+        total = round(n * p_of_agent_moving)
+        moving = self.random.generator.choice(n, total, replace=False)
+        self.move_dead_agents(moving)
+
+        # unique random positions between 1 and size - 1 on each axis
+        moving = moving[self.can_move(moving)]
+        self.pos_X[moving], self.pos_Y[moving] = sample_unique_cells(len(moving), 1, size - 1, self.random.generator)
+
+    def can_move(self, indexes):
+        """Returns which of the given agents can move. Dead people do not move and quarantine people stay there
+
+        Args:
+            indexes (Array): Agents' indexes
+
+        Returns:
+            (Array): True for the agents that can move
+        """
+        return (self.health_status[indexes] != constants.DEAD) & \
+            ~((self.pos_X[indexes] == constants.QUARANTINE_X) & (self.pos_Y[indexes] == constants.QUARANTINE_Y))
+
+    def move_dead_agents(self, indexes):
+        """Moves the dead agents, from the given ones, out of the environment
+
+        Args:
+            indexes (Array): Agents' indexes
+        """
+        dead = indexes[self.health_status[indexes] == constants.DEAD]
+        self.pos_X[dead] = constants.DEAD_X
+        self.pos_Y[dead] = constants.DEAD_Y
+
+    def set_health_status_by_day(self):
+        """Updates the agents health status based on the number of days infected with the virus
+        """
+        n = self.count
+        infected = np.flatnonzero(self.infected() & ~self.recovered[:n])
+        health_status = self.health_status[infected]
+        previous_health_status = self.previous_health_status[infected]
+        infected_days = self.infected_days[infected]
+
+        _, recovered, dead = disease.progress_infections(
+            health_status, previous_health_status, infected_days, self.immune_system_response[infected], self.random.generator)
+
+        self.health_status[infected] = health_status
+        self.previous_health_status[infected] = previous_health_status
+        self.infected_days[infected] = infected_days
+        self.recovered[infected[recovered]] = True
+        self.daily_healed += int(np.count_nonzero(recovered))
+        self.daily_dead += int(np.count_nonzero(dead))
+        self.daily_quarantine -= int(np.count_nonzero(dead & self.in_quarantine()[infected]))
+
+    def update_health_status(self):
+        """
+        Updates the status for each agent when in contact with other agents
+        """
+        n = self.count
+        hs = self.health_status[:n]
+        days = self.infected_days[:n]
+        # excluding the day 0, when the agents get the infection
+        contagious = np.flatnonzero(self.infected() & (days != NONE_VALUE) & (days != 0))
+        # only agents not recovered and not infected can have their health status updated
+        susceptible = np.flatnonzero(~self.recovered[:n] & (hs > constants.ASYMPTOMATIC))
+
+        sources, targets = cell_list_pairs(self.pos_X, self.pos_Y, contagious, susceptible)
+        if len(sources) == 0:
+            return
+
+        if constants.COMBINED_HAZARD:
+            # a single random draw for each agent, from the combined probabilities of all its contacts
+            targets, new_hs = disease.combined_transmission_outcomes(
+                targets, hs[sources], self.immune_system_response[targets], self.wear_mask[sources], self.wear_mask[targets], self.random.generator)
+            targets = targets[new_hs != -1]
+            hs[targets] = new_hs[new_hs != -1]
+            self.daily_infected += len(targets)
+            return
+
+        new_hs = NumpySimulation.value_based_probability(
+            hs[sources], self.immune_system_response[targets], self.wear_mask[sources], self.wear_mask[targets], self.random.generator)
+
+        # each agent takes the first contact, in a random order, that changes its health status
+        changed = np.flatnonzero(new_hs != -1)
+        changed = changed[self.random.generator.permutation(len(changed))]
+        targets, first = np.unique(targets[changed], return_index=True)
+        hs[targets] = new_hs[changed[first]]
+        self.daily_infected += len(targets)
+
+    def update_quarantine(self, size):
+        """Updates the status for each agent in quarantine
+
+        Args:
+            size (Integer): Environment size
+        """
+        n = self.count
+        infected = np.flatnonzero(~self.in_quarantine() & self.infected())
+        # only a percentage of agents go to quarantine, the others remain indetected by autorities
+        going = infected[:int(len(infected) * constants.QUARANTINE_PERCENTAGE)]
+        self.pos_X[going] = constants.QUARANTINE_X
+        self.pos_Y[going] = constants.QUARANTINE_Y
+        self.quarantine[going] = True
+        self.daily_quarantine += len(going)
+
+        # removing healed people from quarantine
+        if constants.SOCIAL_DISTANCE_STEP == 0:
+            leaving = np.flatnonzero(self.in_quarantine() & (self.health_status[:n] > constants.ASYMPTOMATIC))
+            if len(leaving):
+                # random empty positions between 1 and size - 1 on each axis
+                in_env = (self.pos_X[:n] >= 1) & (self.pos_X[:n] < size) & (self.pos_Y[:n] >= 1) & (self.pos_Y[:n] < size)
+                occupied = np.zeros((size - 1) ** 2, dtype=bool)
+                occupied[(self.pos_X[:n][in_env] - 1) * (size - 1) + self.pos_Y[:n][in_env] - 1] = True
+                free = np.flatnonzero(~occupied)
+                if len(leaving) > len(free):
+                    logging.error(
+                        f"There are no free cells for the {len(leaving)} agents leaving the quarantine")
+                    sys.exit()
+                cells = self.random.generator.choice(free, len(leaving), replace=False)
+                self.pos_X[leaving] = cells // (size - 1) + 1
+                self.pos_Y[leaving] = cells % (size - 1) + 1
+                self.daily_quarantine -= len(leaving)
+
+    @ staticmethod
+    def value_based_probability(health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent, rng=np.random):
+        """Returns the agents new health status based on their immune system type and on the health status of the agents in contact with.
+        The same as Simulation.value_based_probability, for arrays of contacts
+
+        Args:
+            health_status (Array): Health status of agents in contact with
+            agent_immune_response (Array): Current agents imune response type
+            wear_mask_agent_in_contact (Array): If agents in contact wear a mask
+            wear_mask_current_agent (Array): If current agents wear a mask
+            rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+        Returns:
+            Health Status (Array): Agents new health status, -1 when it does not change
+        """
+        random_value = rng.random(len(health_status))
+        return disease.transmission_outcomes(
+            health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent, random_value)
+
+    def get_quarantine_count(self):
+        """Number of agents in quarantine
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.in_quarantine()))
+
+    def get_infected_count(self):
+        """Number of agents infected
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.infected()))
+
+    def get_healed_count(self):
+        """Number of healead agents
+
+        Returns:
+            (Integer): Number of agents
+        """
+        hs = self.health_status[:self.count]
+        return int(np.count_nonzero((hs == constants.WITH_DISEASES_SEQUELAES) | (hs == constants.TOTAL_RECOVERY)))
+
+    def get_healed_quarantine_count(self):
+        """Number of healead agents that was on quarantine
+
+        Returns:
+            (Integer): Number of agents
+        """
+        hs = self.health_status[:self.count]
+        return int(np.count_nonzero(self.quarantine[:self.count] &
+                                    ((hs == constants.WITH_DISEASES_SEQUELAES) | (hs == constants.TOTAL_RECOVERY))))
+
+    def get_dead_count(self):
+        """Number of dead agents
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.health_status[:self.count] == constants.DEAD))
+
+    def get_dead_quarantine_count(self):
+        """Number of dead agents from quarantine
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.quarantine[:self.count] & (self.health_status[:self.count] == constants.DEAD)))
+
+    def get_healthy_count(self):
+        """Number of healthy agents
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.health_status[:self.count] == constants.HEALTHY))
+
+    def get_immune_people_count(self):
+        """Number of immune agents
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.immune_system_response[:self.count] == constants.IMR_IMMUNE))
+
+    def get_wearing_mask_count(self):
+        """Number of agents wearing mask
+
+        Returns:
+            (Integer): Number of agents
+        """
+        return int(np.count_nonzero(self.wear_mask[:self.count]))
+
+    def reset_daily_data(self):
+        """Resets the daily total to "0"
+
+        """
+        self.daily_infected = 0
+        self.daily_healed = 0
+        self.daily_dead = 0
+        self.daily_quarantine = 0
+
+    def get_daily_data(self):
+        """Returns daily data counters. You should call the reset_daily_data class method after using this one
+
+        Returns:
+            self.daily_infected (Integer), self.daily_healed (Integer), self.daily_dead (Integer), self.daily_quarantine (Integer): daily counters
+        """
+        return self.daily_infected, self.daily_healed, self.daily_dead, self.daily_quarantine
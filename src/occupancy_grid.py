@@ -0,0 +1,72 @@
+class OccupancyGrid:
+    """Counts, for each cell, the agents whose social distance window covers it, so checking if a cell keeps the social distance is a single lookup
+    """
+    def __init__(self, social_distance_step):
+        """OccupancyGrid constructor
+
+        Args:
+            social_distance_step (Integer): Number of cells on each axis around an agent where no other agent can move to
+        """
+        # offsets of the window around each agent, computed only once
+        self.offsets = [(x_ax, y_ax)
+                        for x_ax in range(-social_distance_step, social_distance_step + 1)
+                        for y_ax in range(-social_distance_step, social_distance_step + 1)]
+        self.step = social_distance_step
+        self.blocked = {}
+
+    def add(self, pos_X, pos_Y):
+        """Blocks the window around an agent's position
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+        """
+        blocked = self.blocked
+        for (x_ax, y_ax) in self.offsets:
+            cell = (pos_X + x_ax, pos_Y + y_ax)
+            blocked[cell] = blocked.get(cell, 0) + 1
+
+    def remove(self, pos_X, pos_Y):
+        """Unblocks the window around an agent's position
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+        """
+        blocked = self.blocked
+        for (x_ax, y_ax) in self.offsets:
+            cell = (pos_X + x_ax, pos_Y + y_ax)
+            if blocked[cell] == 1:
+                del blocked[cell]
+            else:
+                blocked[cell] -= 1
+
+    def move(self, pos_X, pos_Y, new_pos_X, new_pos_Y):
+        """Moves an agent's window to its new position
+
+        Args:
+            pos_X (Integer): Current x axis position
+            pos_Y (Integer): Current y axis position
+            new_pos_X (Integer): New x axis position
+            new_pos_Y (Integer): New y axis position
+        """
+        if (pos_X, pos_Y) != (new_pos_X, new_pos_Y):
+            self.remove(pos_X, pos_Y)
+            self.add(new_pos_X, new_pos_Y)
+
+    def is_free(self, pos_X, pos_Y, own_pos_X, own_pos_Y):
+        """Checks if an agent can move to a position keeping the social distance with all the other agents
+
+        Args:
+            pos_X (Integer): X axis position to check
+            pos_Y (Integer): Y axis position to check
+            own_pos_X (Integer): Current x axis position of the agent that is moving, its own window is not counted
+            own_pos_Y (Integer): Current y axis position of the agent that is moving, its own window is not counted
+
+        Returns:
+            (Boolean): True if no other agent is in the window around the position
+        """
+        count = self.blocked.get((pos_X, pos_Y), 0)
+        if abs(pos_X - own_pos_X) <= self.step and abs(pos_Y - own_pos_Y) <= self.step:
+            count -= 1
+        return count == 0
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class PressureMap:
+    """Counts, for each cell of the grid, the infectious agents in its contact neighbourhood (the Moore neighbourhood of the contagious radius),
+    in separate layers such as health status and mask. The agents are rasterized in count grids, which are then summed over the neighbourhood
+    with a separable box filter, so the contacts of any cell are a single array lookup
+    """
+    def __init__(self, width, height, radius, layers, torus=True):
+        """PressureMap constructor
+
+        Args:
+            width (Integer): Grid width
+            height (Integer): Grid height
+            radius (Integer): Number of cells on each axis around a cell that are in contact with it
+            layers (Integer): Number of layers, counted separately
+            torus (Boolean, optional): If the grid wraps around its edges, like mesa's MultiGrid. Defaults to True.
+        """
+        self.width = width
+        self.height = height
+        self.radius = int(radius)
+        self.layers = layers
+        self.torus = torus
+        self.counts = np.zeros((layers, width, height), dtype=np.int32)
+
+    def box_sum(self, grid, axis):
+        """Sums the grid over the neighbourhood along one axis. On a torus a cell is counted once, even if the neighbourhood wraps over it
+
+        Args:
+            grid (Array): Count grids, one for each layer
+            axis (Integer): Axis of the sum, 1 for x and 2 for y
+
+        Returns:
+            (Array): Summed grids
+        """
+        size = grid.shape[axis]
+        if self.torus:
+            shifts = {shift % size for shift in range(-self.radius, self.radius + 1)}
+            total = np.zeros_like(grid)
+            for shift in shifts:
+                total += np.roll(grid, shift, axis=axis)
+            return total
+
+        # prefix sums with a zero border, the neighbourhood is cut at the edges
+        padding = [(0, 0)] * grid.ndim
+        padding[axis] = (1, 0)
+        prefix = np.pad(np.cumsum(grid, axis=axis), padding)
+        index = np.arange(size)
+        upper = np.take(prefix, np.minimum(index + self.radius + 1, size), axis=axis)
+        lower = np.take(prefix, np.maximum(index - self.radius, 0), axis=axis)
+        return upper - lower
+
+    def update(self, layer, pos_X, pos_Y):
+        """Rasterizes the agents and sums them over the contact neighbourhood of every cell
+
+        Args:
+            layer (Array): Layer of each agent
+            pos_X (Array): X axis position of each agent
+            pos_Y (Array): Y axis position of each agent
+        """
+        cells = (np.asarray(layer) * self.width + np.asarray(pos_X)) * self.height + np.asarray(pos_Y)
+        grid = np.bincount(cells, minlength=self.layers * self.width * self.height).astype(np.int32)
+        grid = grid.reshape(self.layers, self.width, self.height)
+        self.counts = self.box_sum(self.box_sum(grid, 1), 2)
+
+    def lookup(self, pos_X, pos_Y):
+        """Returns the number of agents in contact with each position, by layer
+
+        Args:
+            pos_X (Array): X axis positions
+            pos_Y (Array): Y axis positions
+
+        Returns:
+            (Array): Number of agents of each layer (columns) in contact with each position (rows)
+        """
+        return self.counts[:, np.asarray(pos_X), np.asarray(pos_Y)].T
@@ -0,0 +1,117 @@
+import numpy as np
+
+
+class RandomStreams:
+    """Random numbers service owned by a simulation, built on a seedable NumPy Generator.
+
+    The single values are served from blocks drawn at once, so the hot loops do not call the generator for each value.
+    It has the methods of the random module used by the simulations, so it can replace it, and the Mesa model random attribute.
+    """
+    def __init__(self, seed=None, buffer_size=4096):
+        """RandomStreams constructor
+
+        Args:
+            seed (Integer or numpy.random.SeedSequence, optional): Seed that reproduces the random numbers. Defaults to None, a random seed.
+            buffer_size (Integer, optional): Number of values drawn in each block. Defaults to 4096.
+        """
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_sequence)
+        self.buffer_size = buffer_size
+        self.uniforms = []
+        self.uniform_index = 0
+
+    def spawn(self, number):
+        """Returns independent streams, for example one for each simulation of a multi simulation execution
+
+        Args:
+            number (Integer): Number of streams
+
+        Returns:
+            (List): RandomStreams instances
+        """
+        return [RandomStreams(seed_sequence, self.buffer_size) for seed_sequence in self.seed_sequence.spawn(number)]
+
+    def random(self):
+        """Returns a random float between 0 and 1, from the buffered block of uniforms
+
+        Returns:
+            (Float): Random value
+        """
+        if self.uniform_index == len(self.uniforms):
+            self.uniforms = self.generator.random(self.buffer_size).tolist()
+            self.uniform_index = 0
+        value = self.uniforms[self.uniform_index]
+        self.uniform_index += 1
+        return value
+
+    def randrange(self, stop):
+        """Returns a random integer between 0 and stop, stop not included
+
+        Args:
+            stop (Integer): Upper limit
+
+        Returns:
+            (Integer): Random value
+        """
+        return int(self.random() * stop)
+
+    def randint(self, low, high):
+        """Returns a random integer between low and high, both included
+
+        Args:
+            low (Integer): Lower limit
+            high (Integer): Upper limit
+
+        Returns:
+            (Integer): Random value
+        """
+        return low + int(self.random() * (high - low + 1))
+
+    def choice(self, seq, p=None):
+        """Returns a random element of a sequence
+
+        Args:
+            seq (List): Sequence to choose from
+            p (List, optional): Probability of each element. Defaults to None, the same probability for all elements.
+
+        Returns:
+            (Any): Random element
+        """
+        if p is not None:
+            return seq[self.generator.choice(len(seq), p=p)]
+        return seq[self.randrange(len(seq))]
+
+    def shuffle(self, seq):
+        """Shuffles a list in place
+
+        Args:
+            seq (List): List to shuffle
+        """
+        for i in range(len(seq) - 1, 0, -1):
+            j = self.randrange(i + 1)
+            seq[i], seq[j] = seq[j], seq[i]
+
+    def sample(self, population, k):
+        """Returns k distinct random elements of a sequence
+
+        Args:
+            population (List): Sequence to sample from
+            k (Integer): Number of elements
+
+        Returns:
+            (List): Random elements
+        """
+        return [population[i] for i in self.generator.choice(len(population), k, replace=False).tolist()]
+
+    def integers(self, low, high, size=None):
+        """Returns a block of random integers between low and high, high not included, for the vectorized code
+
+        Args:
+            low (Integer): Lower limit
+            high (Integer): Upper limit
+            size (Integer or Tuple, optional): Output shape. Defaults to None, a single value.
+
+        Returns:
+            (Array): Random values
+        """
+        return self.generator.integers(low, high, size)
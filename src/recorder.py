@@ -0,0 +1,157 @@
+import constants
+import numpy as np
+from collections.abc import Sequence
+
+
+class TimeSeriesRecorder:
+    """Time series of a simulation run, one named series for each metric, stored in preallocated NumPy columns.
+    Recording a step is a single write of all the metrics, and the columns double their capacity when they get full.
+
+    It can also take the place of mesa's DataCollector: collect calls the reporters of each series, and model_vars and get_model_vars_dataframe
+    give the recorded values to the chart modules and to the batch runs.
+    """
+    def __init__(self, names, capacity=constants.EPISODES, reporters=None, dtype=np.int64):
+        """TimeSeriesRecorder constructor
+
+        Args:
+            names (List): Name of each series
+            capacity (Integer, optional): Number of steps the columns hold before growing. Defaults to constants.EPISODES.
+            reporters (Dictionary, optional): Function that returns the value of a series for a model, by series name. Defaults to None.
+            dtype (numpy.dtype, optional): Type of the values. Defaults to np.int64.
+        """
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.reporters = reporters or {}
+        self.columns = np.zeros((len(self.names), max(1, capacity)), dtype=dtype)
+        self.length = 0
+
+    @classmethod
+    def from_reporters(cls, reporters, capacity=constants.EPISODES):
+        """Returns a recorder with a series for each reporter, like mesa's DataCollector model reporters
+
+        Args:
+            reporters (Dictionary): Function that returns the value of a series for a model, by series name
+            capacity (Integer, optional): Number of steps the columns hold before growing. Defaults to constants.EPISODES.
+
+        Returns:
+            (TimeSeriesRecorder): New recorder
+        """
+        return cls(reporters.keys(), capacity, reporters)
+
+    def __len__(self):
+        """Number of recorded steps
+
+        Returns:
+            (Integer): Number of steps
+        """
+        return self.length
+
+    def __getstate__(self):
+        """Pickles only the recorded part of the columns
+
+        Returns:
+            (Dictionary): Recorder state
+        """
+        state = self.__dict__.copy()
+        state["columns"] = self.columns[:, :self.length].copy()
+        return state
+
+    def record(self, *values):
+        """Records the value of every series for a new step, in the order of the names
+
+        Args:
+            values (Integer): Value of each series
+        """
+        if self.length == self.columns.shape[1]:
+            # doubling the capacity, the recorded values are copied only when it grows
+            columns = np.zeros((self.columns.shape[0], 2 * self.columns.shape[1]), dtype=self.columns.dtype)
+            columns[:, :self.length] = self.columns
+            self.columns = columns
+        self.columns[:, self.length] = values
+        self.length += 1
+
+    def collect(self, model):
+        """Records the values returned by the reporters for the model's current step
+
+        Args:
+            model (Any): Model given to the reporters
+        """
+        self.record(*[reporter(model) for reporter in self.reporters.values()])
+
+    def series(self, name):
+        """Returns the recorded values of a series, as a view of its column (no copy)
+
+        Args:
+            name (String): Series name
+
+        Returns:
+            (Array): Recorded values
+        """
+        return self.columns[self.index[name], :self.length]
+
+    def views(self):
+        """Returns the recorded values of every series, in the order of the names, as views of the columns (no copy)
+
+        Returns:
+            (List): Array of each series
+        """
+        return [self.series(name) for name in self.names]
+
+    def to_dict(self):
+        """Returns the recorded values of every series by name, as views of the columns (no copy)
+
+        Returns:
+            (Dictionary): Array of each series
+        """
+        return {name: self.series(name) for name in self.names}
+
+    @property
+    def model_vars(self):
+        """Recorded values of every series by name, like mesa's DataCollector. The chart modules read the last value of each series
+        on every render, so the series are not copied and only the values read are converted to Python values for their JSON
+
+        Returns:
+            (Dictionary): PythonValues of each series
+        """
+        return {name: PythonValues(self.series(name)) for name in self.names}
+
+    def get_model_vars_dataframe(self):
+        """Returns the recorded values as a DataFrame with a column for each series, like mesa's DataCollector
+
+        Returns:
+            (pandas.DataFrame): Recorded values
+        """
+        # pandas is installed with mesa, the V1 runs do not need it
+        import pandas as pd
+        return pd.DataFrame(self.to_dict())
+
+
+class PythonValues(Sequence):
+    """Read only view of a recorded series that returns Python values instead of NumPy ones, converting only the values read
+    """
+    def __init__(self, column):
+        """PythonValues constructor
+
+        Args:
+            column (Array): Recorded values of the series
+        """
+        self.column = column
+
+    def __len__(self):
+        """Number of recorded values
+
+        Returns:
+            (Integer): Number of values
+        """
+        return len(self.column)
+
+    def __getitem__(self, index):
+        """Returns a value, or a list of values for a slice
+
+        Args:
+            index (Integer or Slice): Position of the values
+
+        Returns:
+            (Integer or List): Python values
+        """
+        return self.column[index].tolist()
@@ -0,0 +1,59 @@
+import numpy as np
+import logging
+import sys
+
+
+def sample_unique_cells(total, low, high, rng=np.random):
+    """Draws distinct random cells in one shot, as a partial permutation of the flattened square between low and high
+
+    Args:
+        total (Integer): Number of cells to draw
+        low (Integer): Lowest position on each axis
+        high (Integer): Highest position on each axis, included
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        pos_X (Array), pos_Y (Array): X and Y positions of the cells, in random order
+    """
+    side = max(0, high - low + 1)
+    if total > side * side:
+        logging.error(
+            f"Cannot place {total} agents in distinct cells, there are only {side * side} cells between {low} and {high} on each axis")
+        sys.exit()
+
+    cells = rng.choice(side * side, total, replace=False)
+    return cells // side + low, cells % side + low
+
+
+def sample_spaced_cells(total, social_distance, low, high, rng=np.random):
+    """Draws random cells keeping the social distance between all of them, in one shot (blue noise placement)
+
+    The square is split in blocks of B cells on each axis, with B between social_distance + 1 and 2 * social_distance + 1.
+    Each chosen block gets one cell, with an offset between 0 and B - 1 - social_distance on each axis,
+    so the cells of two different blocks are always more than social_distance apart on at least one axis.
+
+    Args:
+        total (Integer): Number of cells to draw
+        social_distance (Integer): Minimum number of cells between two cells on at least one axis
+        low (Integer): Lowest position on each axis
+        high (Integer): Highest position on each axis, included
+        rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
+
+    Returns:
+        pos_X (Array), pos_Y (Array): X and Y positions of the cells, in random order
+    """
+    side = max(0, high - low + 1)
+    # the biggest blocks that fit all the cells, bigger blocks give more random offsets
+    for block in range(2 * social_distance + 1, social_distance, -1):
+        blocks_per_axis = (side + social_distance) // block
+        if blocks_per_axis * blocks_per_axis >= total:
+            break
+    else:
+        logging.error(
+            f"Cannot place {total} agents with a social distance of {social_distance} between {low} and {high} on each axis")
+        sys.exit()
+
+    blocks = rng.choice(blocks_per_axis * blocks_per_axis, total, replace=False)
+    offsets = rng.choice(block - social_distance, size=(2, total))
+    return (low + (blocks // blocks_per_axis) * block + offsets[0],
+            low + (blocks % blocks_per_axis) * block + offsets[1])
@@ -1,11 +1,17 @@
 import constants
 from agent import Agent
+from spatial_grid import SpatialGrid
+from occupancy_grid import OccupancyGrid
+from free_cell_pool import FreeCellPool
+from contacts import in_contact
+from random_streams import RandomStreams
+import disease
 import random
 from random import sample
 from tqdm import tqdm
 import sys
-import math
 import logging
+import numpy as np
 
 logging.basicConfig(
     level=constants.LOG_LEVEL,
@@ -18,14 +24,39 @@ logging.basicConfig(
 class Simulation:
     """Class representing the simulation
     """
-    def __init__(self, name):
+    def __init__(self, name, size=constants.SIZE, check_counters=False, rng=None):
         """Simulation constructor
 
         Args:
             name (Any): Simulation's name
+            size (Integer, optional): Environment size. Defaults to constants.SIZE.
+            check_counters (Boolean, optional): If the population counters are checked against a full scan of the agents each time they are read. Defaults to False.
+            rng (RandomStreams, optional): Random numbers generator. Defaults to None, a new one with constants.SEED.
         """
         self.name = name
+        self.random = rng if rng is not None else RandomStreams(constants.SEED)
+        # living agents, the dead ones are moved to the dead agents archive so the daily passes do not visit them
         self.agent_list = []
+        self.dead_agents = []
+        # number of archived agents already moved to the dead position
+        self.buried_count = 0
+        # agents that can still get the virus (not infected, not recovered, not dead and not immune), in creation order
+        self.susceptible = {}
+        # agents bucketed by position, so each agent only looks for contacts in its neighbouring cells
+        self.grid = SpatialGrid(constants.CONTAGIOUS_DISTANCE)
+        # cells blocked by the social distance of each agent, used when moving with social distance
+        self.occupancy = OccupancyGrid(constants.SOCIAL_DISTANCE_STEP)
+        # empty cells where the agents can move to or return from quarantine, between 1 and size - 1 on each axis
+        self.free_cells = FreeCellPool(1, size - 1)
+        # agents that can infect others (SICK or ASYMPTOMATIC after their day 0), updated each day
+        self.infectious = {}
+        # population counters, updated on each health status or quarantine change
+        self.check_counters = check_counters
+        self.health_status_counts = {health_status: 0 for health_status in constants.HEALTH_STATUS_DICT}
+        self.quarantine_health_status_counts = {health_status: 0 for health_status in constants.HEALTH_STATUS_DICT}
+        self.quarantine_count = 0
+        self.immune_count = 0
+        self.wearing_mask_count = 0
         self.daily_infected = 0
         self.daily_healed = 0
         self.daily_dead = 0
@@ -39,50 +70,26 @@ class Simulation:
                         size (Integer): Environment size
             p_of_agent_moving (Float, optional): Percentage of agents that move in the step. Defaults to 1.
         """
+        self.bury_dead_agents()
         total = round(len(self.agent_list) * p_of_agent_moving)
-        for agent in random.sample(self.agent_list, total):
-            if agent.health_status != constants.DEAD and agent.pos_tuple != (constants.QUARANTINE_X, constants.QUARANTINE_Y):
-                has_value = False
-
-                new_pos_X = agent.pos_X + \
-                    random.randint(-random_limit, random_limit)
-
-                new_pos_Y = agent.pos_Y + \
-                    random.randint(-random_limit, random_limit)
-
-                tuple_list = [agent_.pos_tuple for agent_ in self.agent_list]
-
-                while not has_value:
-                    can_add = True
-                    x_loop_must_break = False
-                    for x_ax in range(constants.SOCIAL_DISTANCE_STEP + 1):
-                        for y_ax in range(constants.SOCIAL_DISTANCE_STEP + 1):
-                            if (new_pos_X + x_ax, new_pos_Y + y_ax) in tuple_list or \
-                                (new_pos_X + x_ax, new_pos_Y - y_ax) in tuple_list or \
-                                (new_pos_X - x_ax, new_pos_Y + y_ax) in tuple_list or\
-                                    (new_pos_X - x_ax, new_pos_Y - y_ax) in tuple_list:
-                                can_add = False
-                                x_loop_must_break = True
-                        if x_loop_must_break:
-                            break
-
-                    if can_add and (new_pos_X >= size or new_pos_Y >= size or new_pos_X < 0 or new_pos_Y < 0):
-                        can_add = False
-
-                    if not can_add:
-                        new_pos_X = agent.pos_X + \
-                            random.randint(-random_limit, random_limit)
-                        new_pos_Y = agent.pos_Y + \
-                            random.randint(-random_limit, random_limit)
-                    else:
-                        has_value = True
-
-                agent.set_position(new_pos_X, new_pos_Y)
-                logging.debug(
-                    f"Agent {agent.id} moved to a new position: {agent.pos_tuple}")
-            elif agent.health_status == constants.DEAD:
-                if agent.pos_tuple != (constants.DEAD_X, constants.DEAD_Y):
-                    agent.set_position(constants.DEAD_X, constants.DEAD_Y)
+        for agent in self.random.sample(self.agent_list, total):
+            if agent.pos_tuple != (constants.QUARANTINE_X, constants.QUARANTINE_Y):
+                # the agent stays where it is if no position keeping the social distance is found
+                for _ in range(constants.RANDOM_STEP_TRIES):
+                    new_pos_X = agent.pos_X + \
+                        self.random.randint(-random_limit, random_limit)
+                    new_pos_Y = agent.pos_Y + \
+                        self.random.randint(-random_limit, random_limit)
+
+                    if 0 <= new_pos_X < size and 0 <= new_pos_Y < size and \
+                            self.occupancy.is_free(new_pos_X, new_pos_Y, agent.pos_X, agent.pos_Y):
+                        self.move_agent(agent, new_pos_X, new_pos_Y)
+                        logging.debug(
+                            f"Agent {agent.id} moved to a new position: {agent.pos_tuple}")
+                        break
+                else:
+                    logging.debug(
+                        f"Agent {agent.id} could not keep the social distance and stays at {agent.pos_tuple}")
 
     def random_step_no_social_distance(self, size,  p_of_agent_moving=1):
         """Simulating the environment step with no care about social distance
@@ -91,27 +98,24 @@ class Simulation:
             size (Integer): Environment size
             p_of_agent_moving (Float, optional): Percentage of agents that move in the step. Defaults to 1.
         """
-        tuple_list = set()
+        self.bury_dead_agents()
         total = round(len(self.agent_list) * p_of_agent_moving)
 
-        while len(tuple_list) < total:
-            x = random.randint(1, size-1)
-            y = random.randint(1, size-1)
-            tuple_list.add((x, y))
-
-        tuple_list = list(tuple_list)
-        random.shuffle(tuple_list)
-
-        for agent in random.sample(self.agent_list, total):
-            # Dead people do not move # quarantine people stay there
-            if agent.health_status != constants.DEAD and agent.pos_tuple != (constants.QUARANTINE_X, constants.QUARANTINE_Y):
-                (new_pos_X, new_pos_Y) = tuple_list.pop()
-                agent.set_position(new_pos_X, new_pos_Y)
+        for agent in self.random.sample(self.agent_list, total):
+            # quarantine people stay there
+            if agent.pos_tuple != (constants.QUARANTINE_X, constants.QUARANTINE_Y):
+                # random empty position between 1 and size - 1 on each axis
+                (new_pos_X, new_pos_Y) = self.free_cells.random_cell(self.random)
+                self.move_agent(agent, new_pos_X, new_pos_Y)
                 logging.debug(
                     f"Agent {agent.id} moved to a new position: {agent.pos_tuple}. He does not care about social distance!")
-            elif agent.health_status == constants.DEAD:
-                if agent.pos_tuple != (constants.DEAD_X, constants.DEAD_Y):
-                    agent.set_position(constants.DEAD_X, constants.DEAD_Y)
+
+    def bury_dead_agents(self):
+        """Moves the agents archived since the last step to the dead position. Dead people do not move
+        """
+        for agent in self.dead_agents[self.buried_count:]:
+            self.move_agent(agent, constants.DEAD_X, constants.DEAD_Y)
+        self.buried_count = len(self.dead_agents)
 
     def create_agent(self, pos_X, pos_Y, name=None, age=None, health_status=None,
                      immune_system_response=None, wear_mask=None):
@@ -126,93 +130,234 @@ class Simulation:
             immune_system_response (Integer, optional): Agent's immune response system type. Defaults to None.
         """
         new_agent = Agent(pos_X, pos_Y, name=name, age=age, health_status=health_status,
-                          immune_system_response=immune_system_response, wear_mask=wear_mask)
+                          immune_system_response=immune_system_response, wear_mask=wear_mask, rng=self.random,
+                          agent_id=len(self.agent_list) + len(self.dead_agents))
         self.agent_list.append(new_agent)
+        if Simulation.is_susceptible(new_agent):
+            self.susceptible[new_agent] = None
+        self.grid.insert(new_agent)
+        self.occupancy.add(pos_X, pos_Y)
+        self.free_cells.occupy(pos_X, pos_Y)
+
+        self.health_status_counts[new_agent.health_status] += 1
+        if new_agent.pos_tuple == (constants.QUARANTINE_X, constants.QUARANTINE_Y):
+            self.quarantine_count += 1
+        if new_agent.immune_system_response == constants.IMR_IMMUNE:
+            self.immune_count += 1
+        if new_agent.wear_mask:
+            self.wearing_mask_count += 1
+
+    def create_agents(self, pos_X, pos_Y, health_status=None, immune_system_response=None, wear_mask=None):
+        """Creates the whole population at once. The missing health status, age and immune system response values are drawn in one block, the other missing values by the Agent class
+
+        Args:
+            pos_X (Array): X axis position of each agent
+            pos_Y (Array): Y axis position of each agent
+            health_status (Array, optional): Health status of each agent. Defaults to None.
+            immune_system_response (Array, optional): Immune response system type of each agent. Defaults to None.
+            wear_mask (Array, optional): If each agent wears a mask. Defaults to None.
+        """
+        total = len(pos_X)
+        if health_status is None:
+            health_status = self.random.generator.choice(
+                constants.HEALTH_ARRAY, p=constants.HEALTH_ARRAY_P, size=total)
+        if immune_system_response is None:
+            ages = self.random.integers(0, 101, size=total)
+            immune_system_response = disease.immune_responses(ages, health_status, self.random.generator)
+        else:
+            ages = [None] * total
+        # python values, the agents values are used as list indexes
+        pos_X, pos_Y, ages, health_status, immune_system_response = (
+            np.asarray(values).tolist() for values in (pos_X, pos_Y, ages, health_status, immune_system_response))
+        wear_mask = [None] * total if wear_mask is None else np.asarray(wear_mask).tolist()
+
+        for agent_values in zip(pos_X, pos_Y, ages, health_status, immune_system_response, wear_mask):
+            x, y, age, hs, imr, mask = agent_values
+            self.create_agent(x, y, age=age, health_status=hs, immune_system_response=imr, wear_mask=mask)
+
+    def move_agent(self, agent, pos_X, pos_Y):
+        """Moves the agent to a new position, keeping the spatial grid, the occupancy grid, the free cells and the quarantine counter up to date
+
+        Args:
+            agent (Agent): Agent to move
+            pos_X (Integer): New x axis position
+            pos_Y (Integer): New y axis position
+        """
+        quarantine_pos = (constants.QUARANTINE_X, constants.QUARANTINE_Y)
+        if agent.pos_tuple == quarantine_pos:
+            self.quarantine_count -= 1
+        if (pos_X, pos_Y) == quarantine_pos:
+            self.quarantine_count += 1
+
+        self.grid.move(agent, pos_X, pos_Y)
+        self.occupancy.move(agent.pos_X, agent.pos_Y, pos_X, pos_Y)
+        self.free_cells.move(agent.pos_X, agent.pos_Y, pos_X, pos_Y)
+        agent.set_position(pos_X, pos_Y)
+
+    def set_health_status(self, agent, health_status):
+        """Changes the agent's health status, keeping the population counters up to date
+
+        Args:
+            agent (Agent): Agent to update
+            health_status (Integer): New health status
+        """
+        previous_health_status = agent.health_status
+        agent.health_status = health_status
+        self.count_health_status_change(agent, previous_health_status)
+
+    def count_health_status_change(self, agent, previous_health_status):
+        """Updates the population counters after the agent's health status was changed
+
+        Args:
+            agent (Agent): Agent with the new health status
+            previous_health_status (Integer): Agent's health status before the change
+        """
+        if previous_health_status != agent.health_status:
+            if agent.health_status <= constants.ASYMPTOMATIC:
+                self.susceptible.pop(agent, None)
+            self.health_status_counts[previous_health_status] -= 1
+            self.health_status_counts[agent.health_status] += 1
+            if agent.quarantine:
+                self.quarantine_health_status_counts[previous_health_status] -= 1
+                self.quarantine_health_status_counts[agent.health_status] += 1
+
+    def check_counter(self, name, value, agents):
+        """Compares a population counter with the number of agents found by a full scan. Only used when check_counters is True
+
+        Args:
+            name (String): Counter's name
+            value (Integer): Counter's value
+            agents (List): Agents found by the full scan
+        """
+        if value != len(agents):
+            logging.error(
+                f"The {name} counter ({value}) is different from the number of agents ({len(agents)})")
+            sys.exit()
 
     def set_health_status_by_day(self):
         """Updates the agents health status based on the number of days infected with the virus
         """
-        for agent in self.agent_list:
-            # evaluating time passing by, for all agents
-            if (agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC) and not agent.recovered:
-                # initializing value
-                if agent.infected_days is None:
-                    agent.infected_days = 0
-                    logging.debug(
-                        f"Agent {agent.id} is now on is day 0 for infected people. He is known as {agent.name}")
-
-                # infected threshould where people recover
-                elif agent.infected_days == constants.INFECTED_DAYS_THRESHOLD_FOR_INFECTED:
-                    value = random.random()
-                    # previous here is because people change to asymptomatic
-                    if agent.health_status == constants.SICK or agent.previous_health_status == constants.SICK:
-                        if value < constants.RECOVERY_SEQUELS_P:
-                            agent.health_status = constants.WITH_DISEASES_SEQUELAES
-                            logging.debug(
-                                f"Agent {agent.id} recovered with sequels from being SICK. He is known as {agent.name}")
-                        else:
-                            agent.health_status = constants.TOTAL_RECOVERY
-                            logging.debug(
-                                f"Agent {agent.id} recovered totaly from being SICK. He is known as {agent.name}")
-                    else:
-                        agent.health_status = constants.TOTAL_RECOVERY
-                        logging.debug(
-                            f"Agent {agent.id} recovered totaly. He is known as {agent.name}")
-                    agent.recovered = True
-                    self.daily_healed += 1
-
-                # case of deadly infected
-                elif agent.infected_days == constants.INFECTED_DAYS_THRESHOLD_FOR_DEAD:
-                    if agent.immune_system_response == constants.IMR_DEADLY_INFECTED:
-                        agent.health_status = constants.DEAD
-                        self.daily_dead += 1
-                        if agent.pos_tuple == (constants.QUARANTINE_X, constants.QUARANTINE_Y):
-                            self.daily_quarantine -= 1
+        # evaluating time passing by, for all infected agents at once
+        infected = [agent for agent in self.agent_list
+                    if (agent.health_status == constants.SICK or agent.health_status == constants.ASYMPTOMATIC) and not agent.recovered]
+        previous_health_status = [agent.health_status for agent in infected]
+        _, recovered, dead = disease.progress_agent_infections(infected, self.random.generator)
+
+        for agent, health_status in zip(infected, previous_health_status):
+            self.count_health_status_change(agent, health_status)
+            if agent.infected_days and agent.health_status <= constants.ASYMPTOMATIC:
+                self.infectious[agent] = None
+            else:
+                self.infectious.pop(agent, None)
 
-                        logging.debug(
-                            f"Sadly Agent {agent.id} died. He was known as {agent.name}")
-                    agent.infected_days += 1
-
-                # infected threshould where people stop being contagious
-                elif agent.infected_days == constants.INFECTED_DAYS_THRESHOLD_FOR_NOT_CONTAGIOUS:
-                    if agent.health_status != constants.ASYMPTOMATIC:
-                        agent.previous_health_status = constants.SICK
-                        agent.health_status = constants.ASYMPTOMATIC
-                        logging.debug(
-                            f"Agent {agent.id} is now better and ASYMPTOMATIC. He is known as {agent.name}")
+        for agent in recovered:
+            self.daily_healed += 1
+            logging.debug(
+                f"Agent {agent.id} recovered and is now {constants.HEALTH_STATUS_DICT[agent.health_status]}. He is known as {agent.name}")
 
-                    agent.infected_days += 1
-                else:
-                    agent.infected_days += 1
+        for agent in dead:
+            self.daily_dead += 1
+            if agent.pos_tuple == (constants.QUARANTINE_X, constants.QUARANTINE_Y):
+                self.daily_quarantine -= 1
+
+            logging.debug(
+                f"Sadly Agent {agent.id} died. He was known as {agent.name}")
+
+        if dead:
+            # archiving the dead agents, they stay in their position until the next step
+            dead_agents = set(dead)
+            self.agent_list = [agent for agent in self.agent_list if agent not in dead_agents]
+            self.dead_agents.extend(dead)
 
     def update_health_status(self):
         """
         Updates the status for each agent when in contact with other agents
         """
-        for current_agent in self.agent_list:
-            # creating a tupple list with the position, the health_status, and the infected days of each agent in the simulation
-            tuple_list = [(agent_.pos_tuple, agent_.health_status, agent_.infected_days, agent_.wear_mask)
-                          for agent_ in self.agent_list]
+        if constants.COMBINED_HAZARD:
+            self.update_health_status_combined()
+            return
+        if constants.PUSH_CONTACTS:
+            self.update_health_status_from_infectious()
+            return
+
+        # only agents not recovered and not infected can have their health status updated
+        for current_agent in list(self.susceptible):
             (x_0, y_0) = current_agent.pos_tuple  # get the agent position
 
-            # for each agent in simulation
-            for ((x_1, y_1), hs_from_agent_in_contact, inf_day_agent_in_contact, wear_mask_agent_in_contact) in tuple_list:
-                # calculating the distance between the points
-                dist = math.hypot(x_0 - x_1, y_0 - y_1)
-                # if not the agent himself and ( it is not recoverd and inside the contagious range) and (agent in contact is sick)
-                if dist != 0 and (dist < constants.CONTAGIOUS_DISTANCE and not current_agent.recovered) and hs_from_agent_in_contact < constants.WITH_DISEASES_SEQUELAES:
-                    if inf_day_agent_in_contact:  # excluding the day 0, when the agents get the infection, where we change from None to 0
-                        # can get the virus, neverthless he got it once before, the recovered instance variable can change
-                        if current_agent.health_status > constants.ASYMPTOMATIC:
-                            hs_new_value_for_current_agent = Simulation.value_based_probability(
-                                hs_from_agent_in_contact, current_agent.immune_system_response, wear_mask_agent_in_contact, current_agent.wear_mask)
-
-                            if hs_new_value_for_current_agent != -1:
-                                current_agent.health_status = hs_new_value_for_current_agent
-                                self.daily_infected += 1
-                                logging.debug(
-                                    f"Agent {current_agent.id} had an update in his health status: {constants.HEALTH_STATUS_DICT[current_agent.health_status]}")
-                                break
+            # for each agent in the neighbouring cells of the spatial grid
+            for agent_ in self.grid.get_neighbors(x_0, y_0):
+                (x_1, y_1) = agent_.pos_tuple
+                # if not the agent himself and inside the contagious range and (agent in contact is sick)
+                if in_contact(x_0 - x_1, y_0 - y_1) and agent_.health_status < constants.WITH_DISEASES_SEQUELAES:
+                    if agent_.infected_days:  # excluding the day 0, when the agents get the infection, where we change from None to 0
+                        hs_new_value_for_current_agent = Simulation.value_based_probability(
+                            agent_.health_status, current_agent.immune_system_response, agent_.wear_mask, current_agent.wear_mask, self.random)
+
+                        if hs_new_value_for_current_agent != -1:
+                            self.set_health_status(current_agent, hs_new_value_for_current_agent)
+                            self.daily_infected += 1
+                            logging.debug(
+                                f"Agent {current_agent.id} had an update in his health status: {constants.HEALTH_STATUS_DICT[current_agent.health_status]}")
+                            break
+
+    def update_health_status_from_infectious(self):
+        """Updates the status of the agents in contact with the infectious agents. Only the agents around the infectious ones are visited,
+        so the cost depends on the number of infected agents instead of the whole population
+        """
+        # agents already updated today, as each agent can only have one update per day
+        resolved = set()
+        for infectious_agent in list(self.infectious):
+            (x_0, y_0) = infectious_agent.pos_tuple
+
+            for current_agent in self.grid.get_neighbors(x_0, y_0):
+                # only agents not recovered and not infected can have their health status updated
+                if current_agent not in self.susceptible or current_agent in resolved:
+                    continue
+
+                (x_1, y_1) = current_agent.pos_tuple
+                if in_contact(x_0 - x_1, y_0 - y_1):
+                    hs_new_value_for_current_agent = Simulation.value_based_probability(
+                        infectious_agent.health_status, current_agent.immune_system_response, infectious_agent.wear_mask, current_agent.wear_mask, self.random)
+
+                    if hs_new_value_for_current_agent != -1:
+                        self.set_health_status(current_agent, hs_new_value_for_current_agent)
+                        self.daily_infected += 1
+                        resolved.add(current_agent)
+                        logging.debug(
+                            f"Agent {current_agent.id} had an update in his health status: {constants.HEALTH_STATUS_DICT[current_agent.health_status]}")
+
+    def update_health_status_combined(self):
+        """Updates the status of the agents in contact with the infectious agents with a single random draw for each agent,
+        from the combined probabilities of all its contacts of the day. See disease.combined_transmission_outcome
+        """
+        # infectious agents in contact with each agent, found around the infectious agents in the push mode
+        contacts = {}
+        if constants.PUSH_CONTACTS:
+            for infectious_agent in self.infectious:
+                (x_0, y_0) = infectious_agent.pos_tuple
+                for current_agent in self.grid.get_neighbors(x_0, y_0):
+                    (x_1, y_1) = current_agent.pos_tuple
+                    if current_agent in self.susceptible and in_contact(x_0 - x_1, y_0 - y_1):
+                        contacts.setdefault(current_agent, []).append((infectious_agent.health_status, infectious_agent.wear_mask))
+        else:
+            for current_agent in self.susceptible:
+                (x_0, y_0) = current_agent.pos_tuple
+                # excluding the day 0, when the agents get the infection, where we change from None to 0
+                agent_contacts = [(agent_.health_status, agent_.wear_mask) for agent_ in self.grid.get_neighbors(x_0, y_0)
+                                  if agent_.health_status < constants.WITH_DISEASES_SEQUELAES and agent_.infected_days
+                                  and in_contact(x_0 - agent_.pos_X, y_0 - agent_.pos_Y)]
+                if agent_contacts:
+                    contacts[current_agent] = agent_contacts
+
+        for current_agent, agent_contacts in contacts.items():
+            hs_new_value_for_current_agent = disease.combined_transmission_outcome(
+                agent_contacts, current_agent.immune_system_response, current_agent.wear_mask, self.random.random())
+
+            if hs_new_value_for_current_agent != -1:
+                self.set_health_status(current_agent, hs_new_value_for_current_agent)
+                self.daily_infected += 1
+                logging.debug(
+                    f"Agent {current_agent.id} had an update in his health status: {constants.HEALTH_STATUS_DICT[current_agent.health_status]}")
 
     def update_quarantine(self, size):
         """Updates the status for each agent in quarantine
@@ -223,8 +368,10 @@ class Simulation:
         """
         for agent in self.get_infected()[:int(len(self.get_infected()) * constants.QUARANTINE_PERCENTAGE)]:  # only half agents go to quarantine, the others remain indetected by autorities
             # quarantine zone
-            agent.set_position(constants.QUARANTINE_X, constants.QUARANTINE_Y)
-            agent.quarantine = True
+            self.move_agent(agent, constants.QUARANTINE_X, constants.QUARANTINE_Y)
+            if not agent.quarantine:
+                agent.quarantine = True
+                self.quarantine_health_status_counts[agent.health_status] += 1
             self.daily_quarantine += 1
             logging.debug(f"Agent {agent.id} is now in quarantine. ")
 
@@ -232,24 +379,15 @@ class Simulation:
         for agent in self.agent_list:
             if agent.health_status > constants.ASYMPTOMATIC and agent.pos_tuple == (constants.QUARANTINE_X, constants.QUARANTINE_Y):
                 if constants.SOCIAL_DISTANCE_STEP == 0:
-                    tuple_set = set(
-                        [agent.pos_tuple for agent in self.agent_list])
-                    total = len(self.agent_list)
-
-                    while len(tuple_set) < total + 1:
-                        x = random.randint(1, size-1)
-                        y = random.randint(1, size-1)
-                        tuple_set.add((x, y))
-
-                    list_ = list(tuple_set)
-                    (pos_X, pos_Y) = list_.pop()
-                    agent.set_position(pos_X, pos_Y)
+                    # random empty position between 1 and size - 1 on each axis
+                    (pos_X, pos_Y) = self.free_cells.random_cell(self.random)
+                    self.move_agent(agent, pos_X, pos_Y)
                     self.daily_quarantine -= 1
                     logging.debug(
                         f"Agent {agent.id} returns to the environment at {agent.pos_tuple}")
 
     @ staticmethod
-    def value_based_probability(health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent):
+    def value_based_probability(health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent, rng=random):
         """Returns the agent new health status based on its immune system type and on the health status of the agent in contact with
 
         SICK_P| HEALTHY | ASSYMPTOMATIC_P|
@@ -261,6 +399,7 @@ class Simulation:
             agent_immune_response (Integer): Current agent imune response type
             wear_mask_agent_in_contact (Boolean): If agent in contact wears a mask
             wear_mask_current_agent (Boolean): If current agent wears a mask
+            rng (RandomStreams, optional): Random numbers generator. Defaults to the random module.
 
         Returns:
             Health Status (Integer): Agent new health status
@@ -268,48 +407,30 @@ class Simulation:
 
         if health_status > 1 or agent_immune_response == constants.IMR_IMMUNE:
             return -1  # do not change the agent's healthy status
-        else:
-            random_value = random.random()
-            # using mask reduces the spread
-            if wear_mask_agent_in_contact:
-                mask_value = constants.CONTAGIOUS_AGENT_MASK
-            elif wear_mask_agent_in_contact and wear_mask_current_agent:
-                mask_value = constants.HEALTHY_AGENT_MASK
-            elif wear_mask_current_agent:
-                mask_value = constants.CONTAGIOUS_AGENT_MASK_HEALTHY_MASK
-            else:
-                mask_value = constants.CONTAGIOUS_AGENT_NO_MASK_HEALTHY_NO_MASK
-
-            if random_value <= constants.SICK_P * mask_value:
-                if agent_immune_response > constants.IMR_ASYMPTOMATIC:
-                    return constants.SICK
-                elif agent_immune_response == constants.IMR_ASYMPTOMATIC:
-                    return constants.ASYMPTOMATIC
-                elif agent_immune_response == constants.IMR_IMMUNE:
-                    return -1
-
-            elif random_value >= constants.SICK_P * mask_value and \
-                    random_value <= constants.SICK_P * mask_value + constants.HEALTHY_P * mask_value:
-                return constants.HEALTHY
-
-            elif random_value >= 1 - constants.ASYMPTOMATIC_P * mask_value:
-                if agent_immune_response > constants.IMR_ASYMPTOMATIC:
-                    return constants.SICK
-                elif agent_immune_response == constants.IMR_ASYMPTOMATIC:
-                    return constants.ASYMPTOMATIC
-                elif agent_immune_response == constants.IMR_IMMUNE:
-                    return -1
-            else:
-                # when agents wear a mask, the probability count is less than 1 so we end up here, where the masks did not allow the contagious
-                return -1
+        # the mask cases and the probability thresholds are computed once in the transmission table
+        return disease.transmission_outcome(
+            health_status, agent_immune_response, wear_mask_agent_in_contact, wear_mask_current_agent, rng.random())
+
+    @staticmethod
+    def is_susceptible(agent):
+        """Checks if the agent can get the virus: not infected, not recovered, not dead and not immune
+
+        Args:
+            agent (Agent): Agent to check
+
+        Returns:
+            (Boolean): True if the agent can get the virus
+        """
+        return not agent.recovered and agent.health_status > constants.ASYMPTOMATIC and agent.health_status != constants.DEAD \
+            and agent.immune_system_response != constants.IMR_IMMUNE
 
     def get_all_agents(self):
-        """Returns the list of agents for the Simulation instance
+        """Returns the list of agents for the Simulation instance, the living ones and the dead ones
 
         Returns:
             agent_list (List): List of agents
         """
-        return self.agent_list
+        return self.agent_list + self.dead_agents
 
     def get_quarantine_count(self):
         """Number of agents in quarantine
@@ -317,8 +438,10 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([agent for agent in self.agent_list
-                    if agent.pos_tuple == (constants.QUARANTINE_X, constants.QUARANTINE_Y)])
+        if self.check_counters:
+            self.check_counter("quarantine", self.quarantine_count, [agent for agent in self.get_all_agents()
+                                                                     if agent.pos_tuple == (constants.QUARANTINE_X, constants.QUARANTINE_Y)])
+        return self.quarantine_count
 
     def get_infected_count(self):
         """Number of agents infected
@@ -326,8 +449,11 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if (x.health_status ==
-                                                   constants.SICK or x.health_status == constants.ASYMPTOMATIC)])
+        count = self.health_status_counts[constants.SICK] + self.health_status_counts[constants.ASYMPTOMATIC]
+        if self.check_counters:
+            self.check_counter("infected", count, [x for x in self.get_all_agents() if (x.health_status ==
+                                                                                 constants.SICK or x.health_status == constants.ASYMPTOMATIC)])
+        return count
 
     def get_infected(self):
         """List of infected agents not in quarantine
@@ -335,7 +461,7 @@ class Simulation:
         Returns:
             (List): Infected agents
         """
-        return [x for x in self.agent_list if x.pos_tuple != (constants.QUARANTINE_X, constants.QUARANTINE_Y) and
+        return [x for x in self.get_all_agents() if x.pos_tuple != (constants.QUARANTINE_X, constants.QUARANTINE_Y) and
                 (x.health_status ==
                  constants.SICK or x.health_status == constants.ASYMPTOMATIC)]
 
@@ -345,8 +471,12 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.health_status ==
-                    constants.WITH_DISEASES_SEQUELAES or x.health_status == constants.TOTAL_RECOVERY])
+        count = self.health_status_counts[constants.WITH_DISEASES_SEQUELAES] + \
+            self.health_status_counts[constants.TOTAL_RECOVERY]
+        if self.check_counters:
+            self.check_counter("healed", count, [x for x in self.get_all_agents() if x.health_status ==
+                                                 constants.WITH_DISEASES_SEQUELAES or x.health_status == constants.TOTAL_RECOVERY])
+        return count
 
     def get_healed_quarantine_count(self):
         """Number of healead agents that was on quarantine
@@ -354,8 +484,12 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.quarantine and
-                    (x.health_status == constants.WITH_DISEASES_SEQUELAES or x.health_status == constants.TOTAL_RECOVERY)])
+        count = self.quarantine_health_status_counts[constants.WITH_DISEASES_SEQUELAES] + \
+            self.quarantine_health_status_counts[constants.TOTAL_RECOVERY]
+        if self.check_counters:
+            self.check_counter("healed quarantine", count, [x for x in self.get_all_agents() if x.quarantine and
+                                                            (x.health_status == constants.WITH_DISEASES_SEQUELAES or x.health_status == constants.TOTAL_RECOVERY)])
+        return count
 
     def get_dead_count(self):
         """Number of dead agents
@@ -363,7 +497,10 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.health_status == constants.DEAD])
+        count = self.health_status_counts[constants.DEAD]
+        if self.check_counters:
+            self.check_counter("dead", count, [x for x in self.get_all_agents() if x.health_status == constants.DEAD])
+        return count
 
     def get_dead_quarantine_count(self):
         """Number of dead agents from quarantine
@@ -371,7 +508,11 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.quarantine and x.health_status == constants.DEAD])
+        count = self.quarantine_health_status_counts[constants.DEAD]
+        if self.check_counters:
+            self.check_counter("dead quarantine", count, [x for x in self.get_all_agents()
+                                                          if x.quarantine and x.health_status == constants.DEAD])
+        return count
 
     def get_healthy_count(self):
         """Number of healthy agents
@@ -379,7 +520,10 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.health_status == constants.HEALTHY])
+        count = self.health_status_counts[constants.HEALTHY]
+        if self.check_counters:
+            self.check_counter("healthy", count, [x for x in self.get_all_agents() if x.health_status == constants.HEALTHY])
+        return count
 
     def get_immune_people_count(self):
         """Number of immune agents
@@ -387,7 +531,10 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.immune_system_response == constants.IMR_IMMUNE])
+        if self.check_counters:
+            self.check_counter("immune", self.immune_count, [x for x in self.get_all_agents()
+                                                             if x.immune_system_response == constants.IMR_IMMUNE])
+        return self.immune_count
 
     def get_wearing_mask_count(self):
         """Number of agents wearing mask
@@ -395,7 +542,9 @@ class Simulation:
         Returns:
             (Integer): Number of agents
         """
-        return len([x for x in self.agent_list if x.wear_mask])
+        if self.check_counters:
+            self.check_counter("wearing mask", self.wearing_mask_count, [x for x in self.get_all_agents() if x.wear_mask])
+        return self.wearing_mask_count
 
     def reset_daily_data(self):
         """Resets the daily total to "0"
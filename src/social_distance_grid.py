@@ -0,0 +1,116 @@
+from mesa.space import MultiGrid
+from free_cell_pool import FreeCellPool
+import numpy as np
+
+
+class SocialDistanceGrid(MultiGrid):
+    """Mesa MultiGrid that keeps, as the agents are placed, moved and removed, the number of occupied cells in the social distance window
+    of every cell, and a pool of the empty cells.
+
+    A cell keeps the social distance when its window has a single occupied cell, the cell of the agent that is moving next to it,
+    so checking a cell is a single lookup, and a random empty cell is drawn in constant time instead of sorting grid.empties.
+    """
+    def __init__(self, width, height, torus, social_distance_step):
+        """SocialDistanceGrid constructor
+
+        Args:
+            width (Integer): Grid width
+            height (Integer): Grid height
+            torus (Boolean): If the grid wraps around its edges
+            social_distance_step (Integer): Number of cells on each axis around a cell in its social distance window
+        """
+        super().__init__(width, height, torus)
+        self.step = social_distance_step
+        # occupied cells in the window of each cell, the cell itself included
+        self.window_count = np.zeros((width, height), dtype=np.int32)
+        # positions of the window around each position of each axis, computed only once
+        self.windows_X = [self.window_axis(x, width) for x in range(width)]
+        self.windows_Y = [self.window_axis(y, height) for y in range(height)]
+        self.free_cells = FreeCellPool(0, width - 1, height - 1)
+
+    def window_axis(self, coord, size):
+        """Returns the positions of the social distance window on one axis, without repeating cells when it wraps around a small torus
+
+        Args:
+            coord (Integer): Position of the window center
+            size (Integer): Grid size on the axis
+
+        Returns:
+            (Slice or Array): Positions of the window, a slice when they do not wrap around
+        """
+        low = coord - self.step
+        high = coord + self.step + 1
+        if not self.torus:
+            return slice(max(0, low), min(size, high))
+        if low >= 0 and high <= size:
+            return slice(low, high)
+        return np.unique(np.arange(low, high) % size)
+
+    def update_window(self, pos, value):
+        """Adds value to the window count of every cell whose window covers pos
+
+        Args:
+            pos (Tuple): Cell that became occupied or empty
+            value (Integer): 1 when it became occupied, -1 when it became empty
+        """
+        # with no social distance the windows are empty
+        if self.step == 0:
+            return
+
+        (x, y) = pos
+        window_X = self.windows_X[x]
+        window_Y = self.windows_Y[y]
+        if isinstance(window_X, slice) or isinstance(window_Y, slice):
+            self.window_count[window_X, window_Y] += value
+        else:
+            self.window_count[np.ix_(window_X, window_Y)] += value
+
+    def _place_agent(self, pos, agent):
+        """Places the agent in the cell, blocking the window around it if the cell was empty
+
+        Args:
+            pos (Tuple): Cell position
+            agent (Agent): Agent to place
+        """
+        (x, y) = pos
+        was_empty = not self.grid[x][y]
+        super()._place_agent(pos, agent)
+        if was_empty:
+            self.update_window(pos, 1)
+            self.free_cells.occupy(x, y)
+
+    def _remove_agent(self, pos, agent):
+        """Removes the agent from the cell, unblocking the window around it if the cell became empty
+
+        Args:
+            pos (Tuple): Cell position
+            agent (Agent): Agent to remove
+        """
+        (x, y) = pos
+        super()._remove_agent(pos, agent)
+        if not self.grid[x][y]:
+            self.update_window(pos, -1)
+            self.free_cells.release(x, y)
+
+    def is_distant(self, pos):
+        """Checks if a cell keeps the social distance: the only occupied cell in its window, the cell itself excluded, is the moving agent's one
+
+        Args:
+            pos (Tuple): Cell position
+
+        Returns:
+            (Boolean): True if the cell keeps the social distance
+        """
+        (x, y) = pos
+        return self.window_count[x, y] - (1 if self.grid[x][y] else 0) == 1
+
+    def random_empty_cell(self, rng):
+        """Returns a random empty cell, in constant time
+
+        Args:
+            rng (RandomStreams): Random numbers generator
+
+        Returns:
+            (Tuple): Cell position
+        """
+        return self.free_cells.random_cell(rng)
@@ -0,0 +1,86 @@
+import math
+
+
+class SpatialGrid:
+    """Uniform grid that buckets the agents by cell to speed up the contact detection
+    """
+    def __init__(self, cell_size):
+        """SpatialGrid constructor
+
+        Args:
+            cell_size (Integer): Length of each cell on both axis. Use the contagious distance so the contacts of an agent are always in the 3x3 cells around it
+        """
+        self.cell_size = max(1, math.ceil(cell_size))
+        # dictionaries as buckets keep the insertion order of the agents
+        self.cells = {}
+
+    def get_cell(self, pos_X, pos_Y):
+        """Returns the cell that contains the given position
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+
+        Returns:
+            (Tuple): Cell coordinates
+        """
+        return (pos_X // self.cell_size, pos_Y // self.cell_size)
+
+    def insert(self, agent):
+        """Adds the agent to the cell of its current position
+
+        Args:
+            agent (Agent): Agent to add
+        """
+        cell = self.get_cell(agent.pos_X, agent.pos_Y)
+        if cell in self.cells:
+            self.cells[cell][agent] = None
+        else:
+            self.cells[cell] = {agent: None}
+
+    def remove(self, agent):
+        """Removes the agent from the cell of its current position
+
+        Args:
+            agent (Agent): Agent to remove
+        """
+        cell = self.get_cell(agent.pos_X, agent.pos_Y)
+        bucket = self.cells[cell]
+        del bucket[agent]
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, agent, pos_X, pos_Y):
+        """Updates the agent's cell before it moves to a new position. The agent's position itself is not changed
+
+        Args:
+            agent (Agent): Agent that is moving
+            pos_X (Integer): New x axis position
+            pos_Y (Integer): New y axis position
+        """
+        if self.get_cell(agent.pos_X, agent.pos_Y) != self.get_cell(pos_X, pos_Y):
+            self.remove(agent)
+            cell = self.get_cell(pos_X, pos_Y)
+            if cell in self.cells:
+                self.cells[cell][agent] = None
+            else:
+                self.cells[cell] = {agent: None}
+
+    def get_neighbors(self, pos_X, pos_Y):
+        """Returns the agents in the 3x3 cells around the given position. Agents in contact are always among them
+
+        Args:
+            pos_X (Integer): X axis position
+            pos_Y (Integer): Y axis position
+
+        Returns:
+            (List): Agents in the neighbouring cells
+        """
+        (cell_X, cell_Y) = self.get_cell(pos_X, pos_Y)
+        neighbors = []
+        for x_ax in range(cell_X - 1, cell_X + 2):
+            for y_ax in range(cell_Y - 1, cell_Y + 2):
+                bucket = self.cells.get((x_ax, y_ax))
+                if bucket:
+                    neighbors.extend(bucket)
+        return neighbors
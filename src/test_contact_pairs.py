@@ -0,0 +1,59 @@
+from contact_pairs import cell_list_pairs, brute_force_pairs, radix_argsort
+import numpy as np
+import pytest
+
+AGENTS = 300
+
+
+def random_positions(size, seed):
+    """Returns crowded random positions, some of them negative like the quarantine and dead zones
+
+    Args:
+        size (Integer): Largest position on each axis
+        seed (Integer): Seed of the random positions
+
+    Returns:
+        (Array), (Array): X and Y axis position of each agent
+    """
+    rng = np.random.default_rng(seed)
+    return rng.integers(-2, size, AGENTS), rng.integers(-2, size, AGENTS)
+
+
+@pytest.mark.parametrize("size", [5, 20, 60])
+@pytest.mark.parametrize("limit", [1, 2, 3, 8, 24])
+def test_cell_list_pairs_match_brute_force(limit, size):
+    pos_X, pos_Y = random_positions(size, limit * 100 + size)
+    pairs_src, pairs_tgt = cell_list_pairs(pos_X, pos_Y, limit=limit)
+    pairs = list(zip(pairs_src.tolist(), pairs_tgt.tolist()))
+
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == brute_force_pairs(pos_X.tolist(), pos_Y.tolist(), limit)
+
+
+@pytest.mark.parametrize("size", [5, 20, 60])
+@pytest.mark.parametrize("limit", [1, 2, 3, 8, 24])
+def test_cell_list_pairs_sources_and_targets(limit, size):
+    pos_X, pos_Y = random_positions(size, limit * 100 + size)
+    rng = np.random.default_rng(size)
+    sources = rng.choice(AGENTS, 50, replace=False)
+    targets = rng.choice(AGENTS, 200, replace=False)
+    pairs_src, pairs_tgt = cell_list_pairs(pos_X, pos_Y, sources, targets, limit)
+
+    expected = {(i, j) for (i, j) in brute_force_pairs(pos_X.tolist(), pos_Y.tolist(), limit)
+                if i in set(sources.tolist()) and j in set(targets.tolist())}
+    assert set(zip(pairs_src.tolist(), pairs_tgt.tolist())) == expected
+
+
+def test_cell_list_pairs_empty():
+    pos_X, pos_Y = random_positions(20, 0)
+    pairs_src, pairs_tgt = cell_list_pairs(pos_X, pos_Y, sources=[], limit=8)
+    assert len(pairs_src) == 0 and len(pairs_tgt) == 0
+
+    pairs_src, pairs_tgt = cell_list_pairs(pos_X, pos_Y, limit=0)
+    assert len(pairs_src) == 0 and len(pairs_tgt) == 0
+
+
+@pytest.mark.parametrize("high", [10, 70_000, 2 ** 40])
+def test_radix_argsort_matches_stable_argsort(high):
+    keys = np.random.default_rng(high).integers(0, high, 5_000)
+    assert np.array_equal(radix_argsort(keys), np.argsort(keys, kind="stable"))
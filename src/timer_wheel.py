@@ -0,0 +1,60 @@
+class TimerWheel:
+    """Calendar of events by day. Each day has a slot in a circular list of buckets, so scheduling an event and getting the events of a day
+    take a time that depends on the number of events, not on the number of agents.
+
+    Events further than the size of the wheel are kept in the bucket of their slot until their day comes.
+    """
+    def __init__(self, size=64):
+        """TimerWheel constructor
+
+        Args:
+            size (Integer, optional): Number of buckets, the number of days ahead the wheel holds without mixing days in a bucket. Defaults to 64.
+        """
+        self.size = size
+        self.buckets = [[] for _ in range(size)]
+        # keys of the items removed from the wheel, their events are dropped when they are due
+        self.cancelled = set()
+
+    def __len__(self):
+        """Number of events in the wheel, including the cancelled ones not yet dropped
+
+        Returns:
+            (Integer): Number of events
+        """
+        return sum(len(bucket) for bucket in self.buckets)
+
+    def schedule(self, day, key, payload=None):
+        """Adds an event to the calendar
+
+        Args:
+            day (Integer): Day when the event is due
+            key (Any): Item of the event, an agent for example
+            payload (Any, optional): Data of the event. Defaults to None.
+        """
+        self.buckets[day % self.size].append((day, key, payload))
+
+    def cancel(self, key):
+        """Drops all the events of an item. The item must not be scheduled again
+
+        Args:
+            key (Any): Item of the events
+        """
+        self.cancelled.add(key)
+
+    def pop_due(self, day):
+        """Removes the events of a day from the calendar, in the order they were scheduled
+
+        Args:
+            day (Integer): Current day
+
+        Returns:
+            (List): (key, payload) of each event due in the day
+        """
+        slot = day % self.size
+        bucket = self.buckets[slot]
+        if not bucket:
+            return []
+
+        due = [(key, payload) for event_day, key, payload in bucket if event_day == day and key not in self.cancelled]
+        self.buckets[slot] = [event for event in bucket if event[0] > day]
+        return due
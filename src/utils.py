@@ -1,13 +1,13 @@
 import constants
 import cv2
 import pickle
-import random
 import time
 import sys
 import logging
 import os
 import math
 import numpy as np
+from numpy_simulation import NumpySimulation
 import matplotlib.pyplot as plt
 from pathlib import Path
 from matplotlib import style
@@ -15,6 +15,10 @@ from matplotlib.ticker import MaxNLocator
 from PIL import Image
 style.use('fivethirtyeight')
 
+# series of the detailed data, in the order of the arguments of save_detailed_data and show_detailed_data
+DETAILED_DATA_SERIES = ["x", "daily_infected", "daily_dead", "daily_healed", "daily_quarantine",
+                        "y_healthy", "y_infected", "y_dead", "y_healed", "y_quarantine"]
+
 logging.basicConfig(
     level=constants.LOG_LEVEL,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -27,16 +31,16 @@ def save_detailed_data(x, daily_infected, daily_dead, daily_healed, daily_quaran
     """Saves cumulative and daily data in charts
 
     Args:
-        x (List): List of days
-        daily_infected (List): List of daily infected
-        daily_dead (List): List of daily dead
-        daily_healed (List): List of daily healed
-        daily_quarantine (List): List of daily quarantine
-        y_healthy (List): List of cumulative healthy agents
-        y_infected (List):  List of cumulative infected agents
-        y_dead (List): List of cumulative dead agents
-        y_healed (List): List of cumulative healed agents
-        y_quarantine (List): List of cumulative quarantine agents
+        x (List or Array): List of days
+        daily_infected (List or Array): List of daily infected
+        daily_dead (List or Array): List of daily dead
+        daily_healed (List or Array): List of daily healed
+        daily_quarantine (List or Array): List of daily quarantine
+        y_healthy (List or Array): List of cumulative healthy agents
+        y_infected (List or Array):  List of cumulative infected agents
+        y_dead (List or Array): List of cumulative dead agents
+        y_healed (List or Array): List of cumulative healed agents
+        y_quarantine (List or Array): List of cumulative quarantine agents
     """
     dict_ = {
         "x": x,
@@ -74,6 +78,45 @@ def save_detailed_data(x, daily_infected, daily_dead, daily_healed, daily_quaran
         pickle.dump(dict_, handle, protocol=pickle.HIGHEST_PROTOCOL)
 
 
+def save_mesa_data(days, currents, dailys, cumulatives, static_beginning, seed):
+    """Saves the series collected by a Mesa model run
+
+    Args:
+        days (List or Array): List of days
+        currents (Dictionary): Current values of each series, by series name
+        dailys (Dictionary): Daily values of each series, by series name
+        cumulatives (Dictionary): Cumulative percentage of each series, by series name
+        static_beginning (Boolean): If the model started with the static values
+        seed (Integer): Seed of the run, None for a random seed
+
+    Returns:
+        (String): Saved file path
+    """
+    dict_ = {
+        "x": days,
+        "currents": currents,
+        "dailys": dailys,
+        "cumulatives": cumulatives,
+    }
+    folder = (f"{constants.PICKLE_DATA}Mesa_Simulation_{constants.TOTAL_NUMBER_OF_AGENTS}_{constants.SIZE}_{constants.TRAVELLING_NUMBER_OF_AGENTS}_{constants.VACCINATED_PRCNT_OF_AGENTS}_"
+              f"{constants.QUARANTINE_PERCENTAGE}_{constants.QUARANTINE_DAYS}")
+    if static_beginning:
+        filename = (f"{folder}/Static_{constants.SICK_PRCNTG}_{constants.ASYMP_PRCNTG}_{constants.IMMMUNE_IMR_PRCNTG}_{constants.ASYMP_IMR_PRCNTG}_{constants.MOD_IMR_PRCNTG}_{constants.SEVERE_IMR_PRCNTG}_"
+                    f"{constants.DEAD_IMR_PRCNTG}_{constants.AGENTS_WEARING_MASK_PRCNTG}_Seed_{seed}_{time.strftime('%Y-%m-%d_%H-%M-%S')}.pickle")
+    else:
+        filename = f"{folder}/Random_Seed_{seed}_{time.strftime('%Y-%m-%d_%H-%M-%S')}.pickle"
+
+    try:
+        Path(folder).mkdir(parents=True, exist_ok=True)
+    except OSError as e:
+        logging.error("Can't create {dir}: {err}".format(dir=folder, err=e))
+        sys.exit()
+
+    with open(filename, 'wb') as handle:
+        pickle.dump(dict_, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return filename
+
+
 def find_max_list(list_):
     """Returns the length of the biggest list in the list of lists
 
@@ -172,7 +215,8 @@ def load_detailed_data_average(max_files_nbr, static_beginning):
     for count, file_ in enumerate(files_list):
         if count <= max_files_nbr:
             with open(f"{folder}/{file_}", 'rb') as handle:
-                dict_ = pickle.load(handle)
+                # the series are saved as lists or as NumPy arrays, the mean is calculated with lists
+                dict_ = {key: np.asarray(value).tolist() for key, value in pickle.load(handle).items()}
                 x_arrays.append(dict_["x"])
                 daily_infected_arrays.append(dict_["daily_infected"])
                 daily_dead_arrays.append(dict_["daily_dead"])
@@ -215,7 +259,8 @@ def load_detailed_data_file(filename):
 
     # getting all data from  file
     with open(f"../{filename}", 'rb') as handle:
-        dict_ = pickle.load(handle)
+        # the series are saved as lists or as NumPy arrays
+        dict_ = {key: np.asarray(value).tolist() for key, value in pickle.load(handle).items()}
         x_array = dict_["x"]
         daily_infected_array = dict_["daily_infected"]
         daily_dead_array = dict_["daily_dead"]
@@ -234,16 +279,16 @@ def show_detailed_data(x, daily_infected, daily_dead, daily_healed, daily_quaran
     """Shows cumulative and daily data in charts
 
     Args:
-        x (List): List of days
-        daily_infected (List): List of daily infected
-        daily_dead (List): List of daily dead
-        daily_healed (List): List of daily healed
-        daily_quarantine (List): List of daily quarantine
-        y_healthy (List): List of cumulative healthy agents
-        y_infected (List):  List of cumulative infected agents
-        y_dead (List): List of cumulative dead agents
-        y_healed (List): List of cumulative healed agents
-        y_quarantine (List): List of cumulative quarantine agents
+        x (List or Array): List of days
+        daily_infected (List or Array): List of daily infected
+        daily_dead (List or Array): List of daily dead
+        daily_healed (List or Array): List of daily healed
+        daily_quarantine (List or Array): List of daily quarantine
+        y_healthy (List or Array): List of cumulative healthy agents
+        y_infected (List or Array):  List of cumulative infected agents
+        y_dead (List or Array): List of cumulative dead agents
+        y_healed (List or Array): List of cumulative healed agents
+        y_quarantine (List or Array): List of cumulative quarantine agents
     """
     if can_plot:
         # adding final chart
@@ -297,14 +342,23 @@ def show_graphic_simulation(simulation):
     """Builds an image to represent the environment graphically and displays it
 
     Args:
-        simulation (Simulation): Instance of Simulation class
+        simulation (Simulation or NumpySimulation): Instance of Simulation or NumpySimulation class
     """
     # starts an rbg of our size
     env = np.zeros((constants.SIZE, constants.SIZE, 3), dtype=np.uint8)
-    for agent in simulation.agent_list:
+    if isinstance(simulation, NumpySimulation):
+        n = simulation.count
+        pos_X = simulation.pos_X[:n]
+        pos_Y = simulation.pos_Y[:n]
         # agents with negative coords are dead or in quarantine
-        if agent.pos_tuple > (0, 0):
-            env[agent.pos_X][agent.pos_Y] = constants.COLORS_DICT[agent.health_status]
+        on_env = (pos_X > 0) | ((pos_X == 0) & (pos_Y > 0))
+        colors = np.array([constants.COLORS_DICT[hs] for hs in sorted(constants.COLORS_DICT)], dtype=np.uint8)
+        env[pos_X[on_env], pos_Y[on_env]] = colors[simulation.health_status[:n][on_env]]
+    else:
+        for agent in simulation.get_all_agents():
+            # agents with negative coords are dead or in quarantine
+            if agent.pos_tuple > (0, 0):
+                env[agent.pos_X][agent.pos_Y] = constants.COLORS_DICT[agent.health_status]
 
     # reading to rgb. Apparently. Even tho color definitions are bgr. ???
     img = Image.fromarray(env, 'RGB')
@@ -316,7 +370,7 @@ def show_graphic_simulation(simulation):
     cv2.waitKey(200)
 
 
-def static_simulation(agents_total, sick_prcntg, asymp_prcntg, immmune_imr_prcntg, asymp_imr_prcntg, mod_imr_prcntg, severe_imr_prcntg, dead_imr_prcntg, wear_mask_prcntg):
+def static_simulation(agents_total, sick_prcntg, asymp_prcntg, immmune_imr_prcntg, asymp_imr_prcntg, mod_imr_prcntg, severe_imr_prcntg, dead_imr_prcntg, wear_mask_prcntg, rng=np.random):
     """ Defining number of people for sick healthy and immune people
 
     Args:
@@ -327,19 +381,15 @@ def static_simulation(agents_total, sick_prcntg, asymp_prcntg, immmune_imr_prcnt
         * mod_imr_prcntg (Float): percentage of agents with immune resposnse system as IMR_MODERATELY_INFECTED from the total number of agents
         * severe_imr_prcntg (Float): percentage of agents with immune resposnse system as IMR_SEVERE_INFECTED from the total number of agents
         * dead_imr_prcntg (Float): percentage of agents with immune resposnse system as IMR_DEADLY_INFECTED from the total number of agents
+        * rng (numpy.random.Generator, optional): Random numbers generator. Defaults to np.random.
 
     Returns:
-       hs_array (List), imr_array (List), mask_array(List): The three arrays with the data to use
+       hs_array (Array), imr_array (Array), mask_array(Array): The three arrays with the data to use, int8 codes and bool masks
     """
     # heath status
     sick_nbr = math.floor(agents_total * sick_prcntg)
     asymp_nbr = math.floor(agents_total * asymp_prcntg)
 
-    sick_array = [constants.SICK for x in range(sick_nbr)]
-    asymp_array = [constants.ASYMPTOMATIC for x in range(asymp_nbr)]
-    healthy_array = [constants.HEALTHY for x in range(
-        agents_total - (sick_nbr + asymp_nbr))]
-
     # IMR
     IMMMUNE_IMR_PRCNTG = math.floor(agents_total * immmune_imr_prcntg)
     ASYMP_IMR_PRCNTG = math.floor(agents_total * asymp_imr_prcntg)
@@ -356,149 +406,20 @@ def static_simulation(agents_total, sick_prcntg, asymp_prcntg, immmune_imr_prcnt
              mod_imr_nbr + severe_imr_nbr + dead_imr_nbr)
         # fixing approximation issues by adding the diff to the dead imr number
         dead_imr_nbr += diff
-        
-    # using healthy agents after imunne number
-    # second part of list, starting after the last IMMMUNE_IMR_PRCNTG
-    virus_array = healthy_array[:IMMMUNE_IMR_PRCNTG] + sick_array + asymp_array
-    random.shuffle(virus_array)
-    # this aligns the hs_array and the imr_array to get healthy people being immune. otherwise, we could get an infected agent with IMR of immune
-    hs_array = healthy_array[IMMMUNE_IMR_PRCNTG:] + virus_array
-    # I do not suffle the hs_array and imr_array to guarantee that only the healty agents are immune
-
-    immune_array = [constants.IMR_IMMUNE for x in range(IMMMUNE_IMR_PRCNTG)]
-    asymp_array = [constants.IMR_ASYMPTOMATIC for x in range(ASYMP_IMR_PRCNTG)]
-    mod_array = [constants.IMR_MODERATELY_INFECTED for x in range(mod_imr_nbr)]
-    severe_array = [constants.IMR_SEVERE_INFECTED for x in range(severe_imr_nbr)]
-    dead_array = [constants.IMR_DEADLY_INFECTED for x in range(dead_imr_nbr)]
-    
-    non_imunne_array = asymp_array + mod_array + severe_array + dead_array
-    random.shuffle(non_imunne_array)
-    # this aligns the hs_array and the imr_array to get healthy people being immune. otherwise, we could get an infected agent with IMR of immune
-    imr_array = immune_array + non_imunne_array
-    # I do not suffle the hs_array and imr_array to guarantee that only the healty agents are immune
-    
-    # wearing mask
-    wear_mask_nbr = math.floor(agents_total * wear_mask_prcntg)
-    
-    wear_mask_array = [True for x in range(wear_mask_nbr)]
-    no_mask_array = [False for x in range(
-        agents_total - wear_mask_nbr)]
-    
-    mask_array = wear_mask_array + no_mask_array
-    random.shuffle(mask_array)
-
-    return hs_array, imr_array, mask_array
-
-
-def generate_random_tuple_list():
-    """Builds a list with unique values of X and Y coordinates as tuples
-
-    Returns:
-        tuple_list (Tuple): Tuple of runique random positions
-    """
-    tuple_list = set()
-    while len(tuple_list) < constants.TOTAL_NUMBER_OF_AGENTS:
-        x = random.randint(0 + constants.RANDOM_LIMIT,
-                           constants.SIZE-constants.RANDOM_LIMIT)
-        y = random.randint(0 + constants.RANDOM_LIMIT,
-                           constants.SIZE-constants.RANDOM_LIMIT)
-        tuple_list.add((x, y))
-
-    tuple_list = list(tuple_list)
-    random.shuffle(tuple_list)
-
-    return tuple_list
 
+    # the first agents are the immune ones, so they are kept healthy
+    # the health status of the other agents is permuted, which pairs them with random non immune IMR
+    virus_array = np.full(agents_total - IMMMUNE_IMR_PRCNTG, constants.HEALTHY, dtype=np.int8)
+    virus_array[:sick_nbr] = constants.SICK
+    virus_array[sick_nbr:sick_nbr + asymp_nbr] = constants.ASYMPTOMATIC
+    hs_array = np.concatenate((np.full(IMMMUNE_IMR_PRCNTG, constants.HEALTHY, dtype=np.int8), rng.permutation(virus_array)))
 
-def get_random_pos(random_tuple_list):
-    """Returns the last tuple as x and y variables for the given list of tuples
+    imr_array = np.repeat(np.array([constants.IMR_IMMUNE, constants.IMR_ASYMPTOMATIC, constants.IMR_MODERATELY_INFECTED,
+                                    constants.IMR_SEVERE_INFECTED, constants.IMR_DEADLY_INFECTED], dtype=np.int8),
+                          [IMMMUNE_IMR_PRCNTG, ASYMP_IMR_PRCNTG, mod_imr_nbr, severe_imr_nbr, dead_imr_nbr])
 
-    Args:
-        random_tuple_list (List): List of tuples (x,y)
-
-    Returns:
-        pos_X (Integer), pos_Y (Integer): Two variable with the X and Y positions to use
-    """
-    (new_pos_X, new_pos_Y) = random_tuple_list.pop()
-    return new_pos_X, new_pos_Y
-
-
-def available_random_pos(simulation):
-    """Returns unique x and y variables based on social distance constant.
-
-    Args:
-        simulation (Simulation): Instance of Simulation class
-
-    Returns:
-        pos_X (Integer), pos_Y (Integer): Two variable with the X and Y positions to use
-    """
-    new_pos_X = 0
-    new_pos_Y = 0
-    has_value = False
-    for _ in simulation.agent_list:
-        new_pos_X = random.randint(
-            0 + constants.RANDOM_LIMIT, constants.SIZE - constants.RANDOM_LIMIT)
-        new_pos_Y = random.randint(
-            0 + constants.RANDOM_LIMIT, constants.SIZE - constants.RANDOM_LIMIT)
-        tuple_list = [
-            agent_.pos_tuple for agent_ in simulation.agent_list]
-        while not has_value:
-            can_add = True
-            x_loop_must_break = False
-            for x_ax in range(constants.SOCIAL_DISTANCE + 1):
-                for y_ax in range(constants.SOCIAL_DISTANCE + 1):
-                    if (new_pos_X + x_ax, new_pos_Y + y_ax) in tuple_list or \
-                        (new_pos_X + x_ax, new_pos_Y - y_ax) in tuple_list or \
-                        (new_pos_X - x_ax, new_pos_Y + y_ax) in tuple_list or\
-                            (new_pos_X - x_ax, new_pos_Y - y_ax) in tuple_list:
-                        can_add = False
-                        x_loop_must_break = True
-                if x_loop_must_break:
-                    break
-
-            if can_add and (new_pos_X >= constants.SIZE or new_pos_Y >= constants.SIZE):
-                can_add = False
-
-            if not can_add:
-                new_pos_X = random.randint(
-                    0 + constants.RANDOM_LIMIT, constants.SIZE - constants.RANDOM_LIMIT)
-                new_pos_Y = random.randint(
-                    0 + constants.RANDOM_LIMIT, constants.SIZE - constants.RANDOM_LIMIT)
-            else:
-                has_value = True
-
-    return new_pos_X, new_pos_Y
-
-
-def create_simulation_agents(new_simulation, random_tuple_list, hs_data=None, imr_data=None, mask_data=None):
-    """Adds all agents to the simulation
-
-    Args:
-        new_simulation (Simulation): Simulation instance
-        random_tuple_list (Tuple): Tuple with generated positions for each agent
-        hs_data (list, optional): List with health data status for each agent. Defaults to None.
-        imr_data (list, optional): List with immune system response data for each agent. Defaults to None.
-    """
-    if constants.SOCIAL_DISTANCE == 0:
-        new_pos_X, new_pos_Y = get_random_pos(random_tuple_list)
-    else:
-        new_pos_X, new_pos_Y = available_random_pos(new_simulation)
-
-    if hs_data is None:
-        health_value = np.random.choice(
-            constants.HEALTH_ARRAY, p=constants.HEALTH_ARRAY_P, size=(1))[0]
-    else:
-        health_value = hs_data.pop()
-
-    if imr_data is None:
-        immune_response_value = None
-    else:
-        immune_response_value = imr_data.pop()
-
-    if mask_data is None:
-        wear_mask = None
-    else:
-        wear_mask = mask_data.pop()
+    # wearing mask
+    wear_mask_nbr = math.floor(agents_total * wear_mask_prcntg)
+    mask_array = rng.permutation(np.arange(agents_total) < wear_mask_nbr)
 
-    new_simulation.create_agent(
-        new_pos_X, new_pos_Y, health_status=health_value, immune_system_response=immune_response_value, wear_mask=wear_mask)
+    return hs_array, imr_array, mask_array